@@ -0,0 +1,48 @@
+"""
+Compares two benchmark result files written by benchmarks/run.py
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 10]
+"""
+import sys
+import json
+import argparse
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='slowdown in percent reported as regression')
+    args = parser.parse_args()
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+
+    print(f"baseline  : {baseline.get('commit')}")
+    print(f"candidate : {candidate.get('commit')}")
+
+    regressions = 0
+    for stage, result in candidate['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before is None:
+            print(f"{stage:<40} {result['best_s'] * 1000:10.2f} ms  (new stage)")
+            continue
+
+        change = (result['best_s'] - before['best_s']) / before['best_s'] * 100
+        regressed = change > args.threshold
+        regressions += regressed
+        print(
+            f"{stage:<40} {before['best_s'] * 1000:10.2f} ms -> {result['best_s'] * 1000:10.2f} ms  "
+            f"{change:+7.1f}%  p99 {before['p99_ms']:.2f} -> {result['p99_ms']:.2f} ms"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+
+    print(f"peak RSS {baseline['peak_rss_mb']:.1f} MB -> {candidate['peak_rss_mb']:.1f} MB")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+"""
+Per stage benchmark of SentiStock hot paths on synthetic headline corpus
+
+Every stage runs in temporary working directory (copy of config/ with prediction cache
+disabled) so real artifacts and models are never overwritten, database is replaced by
+in memory stand-in. Results (throughput, latency percentiles, peak RSS) are saved as json
+which can be compared between commits with benchmarks/compare.py
+
+Usage:
+    python benchmarks/run.py --rows 50000 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import datetime
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import yaml
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import generate_headlines, write_csv_shards, parse_label_mix, DEFAULT_LABEL_MIX
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on linux and bytes on macos
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def percentiles(timings: list[float]) -> dict:
+    timings = np.asarray(timings) * 1000
+    return {
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p95_ms': float(np.percentile(timings, 95)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'max_ms': float(timings.max()),
+    }
+
+
+def run_stage(results: dict, name: str, fn, rows: int, repeat: int) -> object:
+    """
+    runs fn repeat times, records throughput, latency percentiles and peak RSS under results[name]
+    and returns output of last run
+    """
+    timings = []
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = fn()
+        timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    results[name] = {
+        'rows': rows,
+        'repeat': repeat,
+        'best_s': best,
+        'rows_per_s': rows / best if best else None,
+        **percentiles(timings),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+    print(f"{name:<36} {best * 1000:10.2f} ms  {results[name]['rows_per_s'] or 0:14.0f} rows/s  {results[name]['peak_rss_mb']:8.1f} MB")
+    return output
+
+
+def prepare_workdir(workdir: str) -> None:
+    shutil.copytree(os.path.join(ROOT, 'config'), os.path.join(workdir, 'config'))
+    os.makedirs(os.path.join(workdir, 'models'))
+    path = os.path.join(workdir, 'config', 'model_config.yaml')
+    with open(path) as file:
+        config = yaml.safe_load(file)
+    config['PredictionCache']['enabled'] = False
+    config['ARTIFACT_FORMAT'] = 'pickle'
+    config['Instrumentation']['mlflow_metrics'] = False
+    with open(path, 'w') as file:
+        yaml.safe_dump(config, file)
+    path = os.path.join(workdir, 'config', 'database_config.yaml')
+    with open(path) as file:
+        config = yaml.safe_load(file)
+    config['ResultWriter']['enabled'] = False
+    with open(path, 'w') as file:
+        yaml.safe_dump(config, file)
+    path = os.path.join(workdir, 'config', 'preprocess_config.yaml')
+    with open(path) as file:
+        config = yaml.safe_load(file)
+    # repeated runs on same corpus would only measure cache hits
+    config['FeatureCache']['enabled'] = False
+    with open(path, 'w') as file:
+        yaml.safe_dump(config, file)
+    os.chdir(workdir)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='size of training corpus')
+    parser.add_argument('--label-mix', type=parse_label_mix, default=DEFAULT_LABEL_MIX, help="e.g. 'positive=0.4,negative=0.3,neutral=0.3'")
+    parser.add_argument('--csv-files', type=int, default=50, help='number of csv exports corpus is split into')
+    parser.add_argument('--batch-size', type=int, default=256, help='headlines per inference batch')
+    parser.add_argument('--latency-samples', type=int, default=200, help='single headline inference calls')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    workdir = tempfile.mkdtemp(prefix='sentistock-bench-')
+    prepare_workdir(workdir)
+
+    import logging
+    from src import logger
+    from src.data import read_csv_headlines
+    from src.data.database import DatabaseHandler
+    from src.preprocess import CountVectTransformer, LabelTransformer
+    from src.model import DecisionTreeClassifier , CLASSIFIERS
+    from src.pipelines import TrainingPipeline, InferencePipeline
+
+    class MemoryDatabaseHandler(DatabaseHandler):
+        """
+        in memory stand-in for database, tables are shared by every instance
+        """
+        tables = {}
+
+        def __init__(self) -> None:
+            super().__init__({'host': 'memory', 'user': None, 'password': None, 'database': 'benchmark'})
+
+        def frame_to_database(self, frame, name) -> None:
+            self.tables[name] = frame.reset_index(drop=True)
+
+        def load_from_database(self, name, columns=None):
+            frame = self.tables[name]
+            return frame if columns is None else frame.loc[:, columns]
+
+        def add_to_database(self, headline, outcome, name) -> None:
+            self.append_frame_to_database(pd.DataFrame([[headline, outcome]], columns=['headline', 'label']), name)
+
+        def append_frame_to_database(self, frame, name) -> None:
+            self.tables[name] = pd.concat([self.tables.get(name), frame], ignore_index=True)
+
+    # per call INFO records would drown benchmark output
+    logger.setLevel(logging.WARNING)
+
+    results = {}
+    corpus = generate_headlines(args.rows, args.label_mix, args.seed)
+    test_corpus = generate_headlines(max(args.rows // 4, 1), args.label_mix, args.seed + 1)
+    MemoryDatabaseHandler().frame_to_database(corpus, 'traindata')
+    MemoryDatabaseHandler().frame_to_database(test_corpus, 'testdata')
+    headlines = test_corpus['headline'].tolist()
+    batch = headlines[:args.batch_size]
+
+    paths = write_csv_shards(corpus, os.path.join(workdir, 'csv'), args.csv_files)
+    run_stage(results, 'read_csv_headlines', lambda: read_csv_headlines(paths), len(corpus), args.repeat)
+
+    vectorizer = CountVectTransformer()
+    X = run_stage(results, 'CountVectTransformer.fit_transform', lambda: vectorizer.fit_transform(corpus['headline']), len(corpus), args.repeat)
+    X_test = run_stage(results, 'CountVectTransformer.transform', lambda: vectorizer.transform(headlines), len(headlines), args.repeat)
+
+    encoder = LabelTransformer()
+    y = run_stage(results, 'LabelTransformer.fit_transform', lambda: encoder.fit_transform(corpus['label']), len(corpus), args.repeat)
+    run_stage(results, 'LabelTransformer.transform', lambda: encoder.transform(test_corpus['label']), len(test_corpus), args.repeat)
+
+    classifier = DecisionTreeClassifier()
+    run_stage(results, 'DecisionTreeClassifier.train_model', lambda: classifier.train_model(X, y, save=True), len(corpus), args.repeat)
+    preds = run_stage(results, 'DecisionTreeClassifier.predict_onFrame', lambda: classifier.predict_onFrame(X_test), len(headlines), args.repeat)
+    run_stage(results, 'LabelTransformer.inverse_transform', lambda: encoder.inverse_transform(preds), len(preds), args.repeat)
+
+    # NumPy engine has to reproduce sklearn vectorizer counts and tree predictions exactly
+    from src.utils.bundle import export_bundle , load_bundle
+    bundle_path = os.path.join(workdir, 'bundle')
+    export_bundle(bundle_path, vectorizer._load(), encoder._load(), classifier.model)
+    bundle = load_bundle(bundle_path)
+    X_engine = run_stage(results, 'BundleVectorizer.transform', lambda: bundle['engine_vectorizer'].transform(headlines), len(headlines), args.repeat)
+    engine_preds = run_stage(results, 'TreeEngine.predict', lambda: bundle['engine_model'].predict(X_engine), len(headlines), args.repeat)
+    if not (np.array_equal(X_engine.indptr, X_test.indptr) and np.array_equal(X_engine.indices, X_test.indices)
+            and np.array_equal(X_engine.data, X_test.data) and np.array_equal(engine_preds, preds)):
+        raise AssertionError('NumPy engine output differs from sklearn')
+
+    # per call latency of NumPy engine against sklearn predict on same vectorized rows
+    for size, rows in [('batch', X_test[:args.batch_size]), ('single', X_test[:1])]:
+        run_stage(results, f'DecisionTreeClassifier.predict_onFrame[{size}]', lambda: classifier.predict_onFrame(rows), rows.shape[0], args.latency_samples)
+        run_stage(results, f'TreeEngine.predict[{size}]', lambda: bundle['engine_model'].predict(rows), rows.shape[0], args.latency_samples)
+        speedup = results[f'DecisionTreeClassifier.predict_onFrame[{size}]']['p50_ms'] / results[f'TreeEngine.predict[{size}]']['p50_ms']
+        results[f'TreeEngine.predict[{size}]']['p50_speedup_vs_sklearn'] = speedup
+        print(f"{'TreeEngine p50 speedup over sklearn':<36} {speedup:10.2f} x  [{size}]")
+
+    for name, backend in CLASSIFIERS.items():
+        if backend is DecisionTreeClassifier:
+            continue
+        model = backend()
+        run_stage(results, f'{name}.train_model', lambda: model.train_model(X, y, save=True), len(corpus), args.repeat)
+        run_stage(results, f'{name}.predict_onFrame', lambda: model.predict_onFrame(X_test), len(headlines), args.repeat)
+        results[f'{name}.predict_onFrame']['model_size_bytes'] = model.report(X_test)['model_size_bytes']
+    results['DecisionTreeClassifier.predict_onFrame']['model_size_bytes'] = classifier.report(X_test)['model_size_bytes']
+
+    training = TrainingPipeline(d_handler=MemoryDatabaseHandler)
+    run_stage(results, 'TrainingPipeline.run_pipeline', training.run_pipeline, len(corpus), args.repeat)
+
+    inference = InferencePipeline(d_handler=MemoryDatabaseHandler)
+    run_stage(results, 'InferencePipeline.run_pipeline[batch]', lambda: inference.run_pipeline(data=batch), len(batch), max(args.repeat, 20))
+    run_stage(results, 'InferencePipeline.run_pipeline[single]', lambda: inference.run_pipeline(data=batch[:1]), 1, args.latency_samples)
+
+    report = {
+        'commit': git_commit(),
+        'created': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {**vars(args), 'label_mix': args.label_mix},
+        'peak_rss_mb': peak_rss_mb(),
+        'stages': results,
+    }
+    with open(output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved benchmark results to : {output}")
+
+    os.chdir(ROOT)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
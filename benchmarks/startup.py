@@ -0,0 +1,77 @@
+"""
+Startup time regression check for `main.py` commands
+
+Every command's imports (main.COMMAND_MODULES, modes like "infer --stream" are own entries) are timed in fresh interpreters and compared
+with budgets (seconds) in benchmarks/startup_budget.json, exits with status 1 when any command
+is over its budget.
+
+Usage:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 7 --output startup.json train infer "infer --stream"
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_PATH = os.path.join(ROOT, 'benchmarks', 'startup_budget.json')
+
+SNIPPET = (
+    "import time; start = time.perf_counter(); "
+    "import main; main.load_command({command!r}); "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure(command: str, repeat: int) -> list[float]:
+    """
+    returns import time (seconds) of command in each of repeat fresh interpreters
+    """
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(command=command)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('commands', nargs='*', help='commands to measure, every command if empty')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per command')
+    parser.add_argument('--output', help='json file to record results in')
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from main import COMMAND_MODULES
+
+    with open(BUDGET_PATH) as file:
+        budgets = json.load(file)
+
+    results = {}
+    failed = False
+    for command in args.commands or list(COMMAND_MODULES):
+        timings = measure(command, args.repeat)
+        median = statistics.median(timings)
+        budget = budgets.get(command)
+        over = budget is not None and median > budget
+        failed = failed or over
+
+        results[command] = {'median': median, 'min': min(timings), 'max': max(timings), 'budget': budget}
+        status = 'OVER BUDGET' if over else 'ok'
+        print(f"{command:<16} median {median:.3f}s  min {min(timings):.3f}s  budget {budget}s  {status}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Synthetic financial headline corpus generator used by benchmarks
+
+Usage:
+    python benchmarks/synthetic.py --rows 100000 --output data/synthetic.csv
+"""
+import os
+import random
+import argparse
+import pandas as pd
+
+COMPANIES = [
+    'Reliance', 'TCS', 'Infosys', 'HDFC Bank', 'ICICI Bank', 'Wipro', 'Tata Motors', 'Adani Ports',
+    'Bharti Airtel', 'Maruti Suzuki', 'Sun Pharma', 'ITC', 'Larsen & Toubro', 'Asian Paints',
+    'Bajaj Finance', 'Axis Bank', 'Kotak Bank', 'HUL', 'Titan', 'NTPC', 'ONGC', 'Coal India',
+]
+INDICES = ['Sensex', 'Nifty', 'Bank Nifty', 'Nifty IT', 'Midcap index', 'Smallcap index']
+PERIODS = ['Q1', 'Q2', 'Q3', 'Q4', 'FY24', 'FY25', 'H1', 'H2']
+
+TEMPLATES = {
+    'positive': [
+        '{company} shares surge {pct}% after strong {period} earnings',
+        '{company} net profit jumps {pct}% YoY, beats estimates',
+        '{index} hits record high as {company} rallies {pct}%',
+        'Brokerages upgrade {company}, see {pct}% upside',
+        '{company} bags order worth Rs {amount} crore, stock gains',
+        '{company} announces bonus issue and {pct}% dividend hike',
+    ],
+    'negative': [
+        '{company} shares tank {pct}% on weak {period} guidance',
+        '{company} profit slumps {pct}% as margins contract',
+        '{index} slides {pct}% dragged by {company}',
+        '{company} downgraded to sell, target cut by {pct}%',
+        'SEBI probe weighs on {company}, stock falls {pct}%',
+        '{company} posts loss of Rs {amount} crore in {period}',
+    ],
+    'neutral': [
+        '{company} to announce {period} results on Friday',
+        '{index} ends flat ahead of RBI policy',
+        '{company} board to consider fund raise of Rs {amount} crore',
+        '{company} appoints new CFO effective next month',
+        'Stocks to watch: {company}, {other} in focus today',
+        '{company} shares trade unchanged at Rs {amount}',
+    ],
+}
+
+DEFAULT_LABEL_MIX = {'positive': 0.4, 'negative': 0.3, 'neutral': 0.3}
+
+
+def generate_headlines(rows: int, label_mix: dict = None, seed: int = 0) -> pd.DataFrame:
+    """
+    returns dataframe with 'headline' and 'label' columns of synthetic financial headlines
+
+    Args:
+        rows : number of headlines
+        label_mix : {label : share} of labels, DEFAULT_LABEL_MIX if None
+        seed : random seed, same seed always generates same corpus
+    """
+    label_mix = DEFAULT_LABEL_MIX if label_mix is None else label_mix
+    rng = random.Random(seed)
+    labels = rng.choices(list(label_mix), weights=list(label_mix.values()), k=rows)
+
+    headlines = []
+    for label in labels:
+        company, other = rng.sample(COMPANIES, 2)
+        headlines.append(rng.choice(TEMPLATES[label]).format(
+            company=company,
+            other=other,
+            index=rng.choice(INDICES),
+            period=rng.choice(PERIODS),
+            pct=round(rng.uniform(0.5, 25), 1),
+            amount=rng.randrange(100, 50000, 50),
+        ))
+
+    return pd.DataFrame({'headline': headlines, 'label': labels})
+
+
+def write_csv_shards(frame: pd.DataFrame, directory: str, files: int) -> list[str]:
+    """
+    splits frame into given number of csv files (with extra unused column like real exports) and returns their paths
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    size = -(-len(frame) // files)
+    for i in range(files):
+        path = os.path.join(directory, f'headlines_{i:04d}.csv')
+        shard = frame.iloc[i * size:(i + 1) * size].assign(source='synthetic')
+        shard.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def parse_label_mix(value: str) -> dict:
+    """
+    parses 'positive=0.4,negative=0.3,neutral=0.3' into dict
+    """
+    mix = {}
+    for part in value.split(','):
+        label, share = part.split('=')
+        mix[label.strip()] = float(share)
+    return mix
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--label-mix', type=parse_label_mix, default=DEFAULT_LABEL_MIX)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help='csv file to write corpus to')
+    args = parser.parse_args()
+
+    generate_headlines(args.rows, args.label_mix, args.seed).to_csv(args.output, index=False)
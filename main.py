@@ -1,8 +1,22 @@
-from src.pipelines import TrainingPipeline , EvaluationPipeline , InferencePipeline
-from src.utils import read_yaml_config
-from src.data.scraper import MC_Scraper
 import sys
-    
+import importlib
+
+# modules imported by each command, heavy dependencies (mlflow, pymongo, nltk, ...) are only
+# loaded by commands which use them, see benchmarks/startup.py for import time budget
+COMMAND_MODULES = {
+    'train': ['src.pipelines'],
+    'update': ['src.pipelines'],
+    'test': ['src.pipelines'],
+    'infer': ['src.pipelines', 'src.data.scraper'],
+    # stream mode scores files / stdin, scraper (requests, bs4) is never imported
+    'infer --stream': ['src.pipelines', 'src.data'],
+    'new': ['src.pipelines'],
+    'serve': ['src.serving', 'src.pipelines'],
+    'export': ['src.utils.bundle', 'src.preprocess'],
+    'tune': ['src.pipelines'],
+    'rescore': ['src.pipelines'],
+}
+
 
 def print_help():
     print('--------------------------------------------------------------------------------------')
@@ -12,52 +26,239 @@ def print_help():
     print('`python main.py train`')
     print('`python main.py test`')
     print('`python main.py infer`')
+    print('`python main.py infer --incremental`')
+    print('`python main.py infer --stream --input headlines.jsonl --batch-size 1000 --workers 0`')
     print('`python main.py new`')
+    print('`python main.py update`')
+    print('`python main.py serve`')
+    print('`python main.py export`')
+    print('`python main.py tune`')
+    print('`python main.py rescore traindata --workers 0`')
     print('use new for running experiment with untrained model ')
+    print('use infer --incremental for scoring only headlines not seen by previous runs')
+    print('use infer --stream for scoring jsonl / csv (--format csv) from file or stdin, one json line per prediction')
+    print('use update for incrementally training SGD classifier on new rows in chunks')
+    print('use serve for running long lived inference server configured in `config/serve_config.yaml`')
+    print('use export for writing memory mapped artifact bundle, enable it with ARTIFACT_FORMAT : bundle')
+    print('use tune for parallel search over Tuning search space, best model is saved to FILEPATH')
+    print('use rescore for resumable scoring of whole database table with current model, see Rescoring config')
     print('--------------------------------------------------------------------------------------')
 
+
+def command_key(command: str, args: list[str]) -> str:
+    """
+    returns COMMAND_MODULES key of given command and its arguments
+    """
+    if command == 'infer' and '--stream' in args:
+        return 'infer --stream'
+    return command
+
+
+def load_command(command: str) -> None:
+    """
+    imports every module used by given command
+    """
+    for module in COMMAND_MODULES[command]:
+        importlib.import_module(module)
+
+
+def train(args: list[str]) -> None:
+    from src.pipelines import TrainingPipeline
+    pipeline = TrainingPipeline()
+    try:
+        pipeline.run_pipeline()
+    except Exception as e:
+        raise e
+
+
+def update(args: list[str]) -> None:
+    from src.pipelines import IncrementalTrainingPipeline
+    pipeline = IncrementalTrainingPipeline()
+    try:
+        pipeline.run_pipeline()
+    except Exception as e:
+        raise e
+
+
+def test(args: list[str]) -> None:
+    from src.pipelines import EvaluationPipeline
+    from src.utils import read_yaml_config
+    model_config = read_yaml_config('config/model_config.yaml')
+    pipeline = EvaluationPipeline()
+    try:
+        pipeline.run_pipeline(
+            log_path=model_config['LOG_PATH']
+        )
+    except Exception as e:
+        raise e
+
+
+def stream(args: list[str]) -> None:
+    """
+    scores headlines from file or stdin in batches and writes one json line per prediction,
+    batches are spread over worker processes with --workers
+    """
+    import json
+    import logging
+    import argparse
+    from src.data import iter_headline_records
+
+    parser = argparse.ArgumentParser(prog='main.py infer --stream')
+    parser.add_argument('--stream', action='store_true')
+    parser.add_argument('--input', default='-', help='jsonl / csv file, - reads stdin')
+    parser.add_argument('--output', default='-', help='jsonl file, - writes stdout')
+    parser.add_argument('--format', default='jsonl', choices=['jsonl', 'csv'])
+    parser.add_argument('--column', default='headline', help='field holding headline')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None, help='score batches on given number of worker processes, 0 uses every core')
+    options = parser.parse_args(args)
+
+    if options.output == '-':
+        # keep stdout for predictions only
+        for handler in logging.getLogger().handlers:
+            if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+                handler.setStream(sys.stderr)
+
+    if options.workers is None:
+        from src.pipelines import InferencePipeline
+        pipeline = InferencePipeline()
+    else:
+        from src.pipelines import ShardedInferencePipeline
+        pipeline = ShardedInferencePipeline(workers=options.workers or None, shard_size=options.batch_size)
+
+    source = sys.stdin if options.input == '-' else open(options.input, 'r', newline='', encoding='utf-8')
+    target = sys.stdout if options.output == '-' else open(options.output, 'w', encoding='utf-8')
+    try:
+        records = iter_headline_records(source, options.format, options.column)
+        for count, (record, label) in enumerate(pipeline.run_stream(records, options.batch_size, options.column), start=1):
+            target.write(json.dumps({**record, 'label': label}, ensure_ascii=False) + '\n')
+            if count % options.batch_size == 0:
+                target.flush()
+        target.flush()
+    finally:
+        if options.workers is not None:
+            pipeline.close()
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+
+def infer(args: list[str]) -> None:
+    if '--stream' in args:
+        return stream(args)
+
+    from src.pipelines import InferencePipeline
+    from src.data.scraper import MC_Scraper , SeenHeadlineIndex
+    pipeline = InferencePipeline()
+    try:
+        if '--incremental' in args:
+            scraper = MC_Scraper(incremental=True)
+            seen_index = SeenHeadlineIndex()
+            headlines = seen_index.filter_new(scraper.get_headlines())
+            if headlines:
+                print(pipeline.run_pipeline(data = headlines))
+            seen_index.mark_seen(headlines)
+            scraper.commit()
+        else:
+            print(pipeline.run_pipeline(
+                data = MC_Scraper().get_headlines()
+            ))
+    except Exception as e:
+        raise e
+
+
+def serve(args: list[str]) -> None:
+    from src.serving import InferenceServer
+    server = InferenceServer()
+    try:
+        server.serve_forever()
+    except Exception as e:
+        raise e
+
+
+def export(args: list[str]) -> None:
+    from src.utils import read_yaml_config
+    from src.utils.bundle import export_bundle
+    from src.utils.artifacts import registry
+    from src.preprocess import CountVectTransformer , LabelTransformer
+    model_config = read_yaml_config('config/model_config.yaml')
+    try:
+        export_bundle(
+            model_config['BUNDLE_PATH'],
+            vectorizer = registry.get(CountVectTransformer().load_path),
+            encoder = registry.get(LabelTransformer().load_path),
+            model = registry.get(model_config['FILEPATH']),
+        )
+    except Exception as e:
+        raise e
+
+
+def tune(args: list[str]) -> None:
+    from src.pipelines import TuningPipeline
+    pipeline = TuningPipeline()
+    try:
+        pipeline.run_pipeline()
+    except Exception as e:
+        raise e
+
+
+def rescore(args: list[str]) -> None:
+    """
+    scores every row of database table in checkpointed chunks, rerun after failure resumes
+    after last written chunk
+    """
+    import argparse
+    from src.pipelines import RescoringPipeline
+
+    parser = argparse.ArgumentParser(prog='main.py rescore')
+    parser.add_argument('table', help='source table holding headlines')
+    parser.add_argument('--chunksize', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None, help='score chunks on given number of worker processes, 0 uses every core')
+    options = parser.parse_args(args)
+
+    pipeline = RescoringPipeline(options.table, chunksize=options.chunksize, workers=options.workers)
+    try:
+        pipeline.run_pipeline()
+    except Exception as e:
+        raise e
+    finally:
+        pipeline.close()
+
+
+def new(args: list[str]) -> None:
+    from src.pipelines import TrainingPipeline , EvaluationPipeline
+    from src.utils import read_yaml_config
+    model_config = read_yaml_config('config/model_config.yaml')
+    train_pipeline = TrainingPipeline()
+    test_pipeline = EvaluationPipeline()
+    try:
+        train_pipeline.run_pipeline()
+        test_pipeline.run_pipeline(
+            log_path=model_config['LOG_PATH']
+        )
+    except Exception as e:
+        raise e
+
+
+COMMANDS = {
+    'train': train,
+    'update': update,
+    'test': test,
+    'infer': infer,
+    'new': new,
+    'serve': serve,
+    'export': export,
+    'tune': tune,
+    'rescore': rescore,
+}
+
+
 if __name__ == "__main__":
-    
-    if len(sys.argv) >= 2:
-        
-        if sys.argv[1] == 'train':
-            pipeline = TrainingPipeline()
-            try:
-                pipeline.run_pipeline()
-            except Exception as e:
-                raise e
-     
-        if sys.argv[1] == 'test':
-            model_config = read_yaml_config('config/model_config.yaml')
-            pipeline = EvaluationPipeline()
-            try:
-                pipeline.run_pipeline(
-                    log_path=model_config['LOG_PATH']
-                )
-            except Exception as e:
-                raise e
-        
-        if sys.argv[1] == 'infer':
-            model_config = read_yaml_config('config/model_config.yaml')
-            pipeline = InferencePipeline()
-            try:
-                print(pipeline.run_pipeline(
-                    data = MC_Scraper().get_headlines()
-                ))
-            except Exception as e:
-                raise e
-     
-        if sys.argv[1] == 'new':
-            model_config = read_yaml_config('config/model_config.yaml')
-            train_pipeline = TrainingPipeline()
-            test_pipeline = EvaluationPipeline()
-            try:
-                train_pipeline.run_pipeline()
-                test_pipeline.run_pipeline(
-                    log_path=model_config['LOG_PATH']
-                )
-            except Exception as e:
-                raise e
-        
+
+    if len(sys.argv) >= 2 and sys.argv[1] in COMMANDS:
+        load_command(command_key(sys.argv[1], sys.argv[2:]))
+        COMMANDS[sys.argv[1]](sys.argv[2:])
+
     else:
-        print_help()
\ No newline at end of file
+        print_help()
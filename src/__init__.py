@@ -6,7 +6,8 @@ import datetime
 logging_str = "--%(asctime)s: %(levelname)s: %(module)s: %(message)s"
 
 log_dir = "logs"
-log_filepath = os.path.join(log_dir,f"logs_{datetime.datetime.now()}.log")
+# one log file per day, opened on first record instead of new file per import
+log_filepath = os.path.join(log_dir,f"logs_{datetime.date.today()}.log")
 os.makedirs(log_dir, exist_ok=True)
 
 
@@ -15,9 +16,9 @@ logging.basicConfig(
     format= logging_str,
 
     handlers=[
-        logging.FileHandler(log_filepath),
+        logging.FileHandler(log_filepath, delay=True),
         logging.StreamHandler(sys.stdout)
     ]
 )
 
-logger = logging.getLogger("mlProjectLogger")
\ No newline at end of file
+logger = logging.getLogger("mlProjectLogger")
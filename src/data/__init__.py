@@ -1,36 +1,110 @@
 import pandas as pd
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from src import logger
 
-def read_csv_headlines(paths : list[str]) -> pd.DataFrame:
+HEADLINE_COLUMNS = ['headline','label']
+
+
+def _file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_csv_file(path: str, cache_dir: str = None) -> pd.DataFrame:
+    """
+    reads headline and label columns of single csv file, using parquet copy from cache_dir if file content is unchanged
+    """
+    path = Path(path)
+    cache_path = None
+
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / f"{_file_digest(path)}.parquet"
+        if cache_path.exists():
+            logger.info(f"reading cached csv file {path} from {cache_path}")
+            return pd.read_parquet(cache_path, columns=HEADLINE_COLUMNS)
+
+    logger.info(f"reading csv file from {path}")
+    frame = pd.read_csv(path, usecols=HEADLINE_COLUMNS, engine='pyarrow').loc[:, HEADLINE_COLUMNS]
+
+    if cache_path is not None:
+        # write to temporary file first so parallel readers never see partial parquet file
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+
+    return frame
+
+
+def read_csv_headlines(paths : list[str], max_workers: int = None, cache_dir: str = None) -> pd.DataFrame:
     """
     read csv files from given path and returns dataframe
 
+    Only headline and label columns are read, files are read in parallel and concatenated once
+
     Args:
         paths : list containig paths to each csv files
+        max_workers : number of threads reading files, default of ThreadPoolExecutor if None
+        cache_dir : directory for parquet copies of csv files keyed by content hash, no caching if None
 
     return : Dataframe
     """
     try:
-        # empty frame to store all instances of headlines from multile csv files
-        data = pd.DataFrame(columns=['headline','label'])
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            frames = list(executor.map(lambda path: _read_csv_file(path, cache_dir), paths))
 
-        for path in paths:
-            logger.info(f"reading csv file from {path}")
-            # read csv file into dataframe
-            frame = pd.read_csv(Path(path))
+        if not frames:
+            return pd.DataFrame(columns=HEADLINE_COLUMNS)
 
-            frame = frame.loc[:,['headline','label']]
+        # concate all dataframes at once instead of growing single frame per file
+        data = pd.concat(frames, axis=0, ignore_index=True)
 
-            # concate original dataframe with new dataframe 
-            data = pd.concat([data,frame],axis=0,ignore_index=True)
-        
         # return final dataframe
         logger.info("Returned data frame from csv files")
         return data
-    
+
     except Exception as e:
         logger.error(f'Read csv headlines failedw ith{e}')
         raise e
-    
+
+
+def iter_headline_records(file, fmt: str = 'jsonl', column: str = 'headline'):
+    """
+    yields one dict per record of open text file without reading whole file into memory
+
+    Args:
+        file : open text file (e.g. sys.stdin)
+        fmt : jsonl (objects or plain strings, one per line) | csv (with header row)
+        column : field holding headline, plain jsonl strings are yielded as {column : string}
+
+    yields : dict
+    """
+    if fmt == 'csv':
+        import csv
+        for record in csv.DictReader(file):
+            if column not in record:
+                raise ValueError(f"csv input has no '{column}' column")
+            yield record
+
+    elif fmt == 'jsonl':
+        import json
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {column: record}
+            elif not isinstance(record, dict) or column not in record:
+                raise ValueError(f"jsonl line {number} has no '{column}' field")
+            yield record
+
+    else:
+        raise ValueError(f"Unknown input format : {fmt}, expected jsonl | csv")
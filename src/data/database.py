@@ -1,12 +1,91 @@
 import pandas as pd
+import io
+import csv
+import time
+import queue
+import datetime
+import threading
 from abc import ABC , abstractmethod
-import pymongo.mongo_client
-from sqlalchemy import create_engine ,text
-import pymongo
+from contextlib import contextmanager
 from src.utils import read_yaml_config
 from src import logger
 
 
+def copy_insert(table, conn, keys: list[str], data_iter) -> None:
+    """
+    pandas to_sql insertion method writing rows with PostgreSQL COPY FROM STDIN instead of
+    row wise INSERT statements
+
+    Args:
+        table : pandas SQLTable
+        conn : sqlalchemy connection
+        keys : column names
+        data_iter : iterable of row values
+    """
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(data_iter)
+    buffer.seek(0)
+
+    columns = ', '.join(f'"{key}"' for key in keys)
+    name = f'"{table.schema}"."{table.name}"' if table.schema else f'"{table.name}"'
+
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {name} ({columns}) FROM STDIN WITH CSV', buffer)
+
+
+# process wide sqlalchemy engines / mongo clients keyed by url, shared by every handler so
+# connection pools are created once per process instead of once per pipeline
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(url: str, **options):
+    """
+    Returns sqlalchemy engine of given url, created with pool options on first call only
+
+    Args:
+        url : database url
+        options : create_engine keyword arguments (pool_size, max_overflow, pool_pre_ping, pool_recycle, ...)
+    """
+    engine = _engines.get(url)
+    if engine is not None:
+        return engine
+
+    with _engines_lock:
+        if url not in _engines:
+            from sqlalchemy import create_engine
+            _engines[url] = create_engine(url, **options)
+        return _engines[url]
+
+
+def get_mongo_client(url: str):
+    """
+    Returns pymongo client of given url, created on first call only
+    """
+    client = _engines.get(url)
+    if client is not None:
+        return client
+
+    with _engines_lock:
+        if url not in _engines:
+            import pymongo
+            _engines[url] = pymongo.MongoClient(url)
+        return _engines[url]
+
+
+def dispose_engines() -> None:
+    """
+    Closes every pooled connection of process wide engines and clients
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            if hasattr(engine, 'dispose'):
+                engine.dispose()
+            else:
+                engine.close()
+        _engines.clear()
+
+
 class DatabaseHandler(ABC):
     def __init__(self, config : dict) -> None:
         """
@@ -24,6 +103,8 @@ class DatabaseHandler(ABC):
         self.user = config['user']
         self.password = config['password']
         self.database = config['database']
+        # identifies database in process wide writers, backends with real connection url override it
+        self.url = f"{self.__class__.__name__.lower()}://{self.host}/{self.database}"
         self.conn = None
     
    
@@ -34,7 +115,7 @@ class DatabaseHandler(ABC):
         """
 
     @abstractmethod
-    def load_from_database(self, name : str) -> pd.DataFrame:
+    def load_from_database(self, name : str, columns: list[str] = None) -> pd.DataFrame:
         """
         loads data from database instance to pandas Dataframe
         """
@@ -45,6 +126,30 @@ class DatabaseHandler(ABC):
         this method adds new records to already existing database
         """
 
+    def iter_from_database(self, name: str, chunksize: int = None, columns: list[str] = None, key: str = None, after = None, where: str = None, params: dict = None):
+        """
+        yields data from database instance as pandas Dataframes of at most chunksize rows
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support chunked loading")
+
+    def append_frame_to_database(self, frame: pd.DataFrame, name: str) -> None:
+        """
+        appends all rows of dataframe to already existing data in single batch
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support batched appends")
+
+    def load_checkpoint(self, job: str, checkpoint_table: str) -> dict:
+        """
+        returns last checkpoint of resumable job, None if job never wrote one
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support checkpointed jobs")
+
+    def append_with_checkpoint(self, frame: pd.DataFrame, name: str, job: str, checkpoint_table: str, last_key, rows: int) -> None:
+        """
+        appends dataframe and records checkpoint of resumable job atomically
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support checkpointed jobs")
+
 
 class PostgreSqlDatabaseHandler(DatabaseHandler):
     """
@@ -65,48 +170,156 @@ class PostgreSqlDatabaseHandler(DatabaseHandler):
 
         return PostgreSqlDatabaseHandler
         """
-        super().__init__(
-            read_yaml_config('config/database_config.yaml')['PostgresConfig']
-        )
+        config = read_yaml_config('config/database_config.yaml')['PostgresConfig']
+        super().__init__(config)
 
-        self.conn = create_engine(f"postgresql://{self.user}:{self.password}@{self.host}:5432/{self.database}")
+        self.chunksize = config.get('chunksize', 10000)
+        self.copy_chunksize = config.get('copy_chunksize', 100000)
+        self.dtype_backend = config.get('dtype_backend', 'numpy_nullable')
+        self.url = f"postgresql://{self.user}:{self.password}@{self.host}:5432/{self.database}"
+        self.pool_options = {
+            'pool_size': config.get('pool_size', 5),
+            'max_overflow': config.get('max_overflow', 10),
+            'pool_pre_ping': config.get('pool_pre_ping', True),
+            'pool_recycle': config.get('pool_recycle', 1800),
+            'pool_timeout': config.get('pool_timeout', 30),
+        }
         logger.info(f"Using PostgreSQL Database handler on host : {self.host}")
 
+    @property
+    def conn(self):
+        """
+        process wide pooled engine, created on first use so handlers which never query never connect
+        """
+        if self._engine is None:
+            self._engine = get_engine(self.url, **self.pool_options)
+        return self._engine
+
+    @conn.setter
+    def conn(self, engine) -> None:
+        self._engine = engine
+
+    @contextmanager
+    def connection(self, **execution_options):
+        """
+        Yields pooled connection which is returned to pool when block exits
+
+        Args:
+            execution_options : sqlalchemy execution options e.g. stream_results=True
+        """
+        with self.conn.connect() as connection:
+            if execution_options:
+                connection = connection.execution_options(**execution_options)
+            yield connection
+
     def execute(self, query: str) -> list:
         """
         To execute custom SQL query
         """
 
-        connection = self.conn.connect()
-        
+        from sqlalchemy import text
+
         try:
-        
-            cursor_result = connection.execute(text(query))
-        
-            return cursor_result.all()
-        
+            with self.connection() as connection:
+                return connection.execute(text(query)).all()
+
         except Exception as e:
         
             raise e
 
-    def load_from_database(self,table_name:str,) -> pd.DataFrame:
+    def _table_columns(self, table_name: str) -> list[str]:
+        """
+        Returns data columns of given table, pandas 'index' column written by to_sql is skipped
+        """
+        from sqlalchemy import inspect
+
+        return [column['name'] for column in inspect(self.conn).get_columns(table_name) if column['name'] != 'index']
+
+    def load_from_database(self,table_name:str, columns: list[str] = None) -> pd.DataFrame:
         """
         This function loads dataset from givem database into pd.Dataframe
 
+        Table is streamed in chunks through server side cursor so whole result set is never
+        buffered next to the frame
+
         Args:
             table_name = 'Train_Data'|'Test_Data'
+            columns : columns to load, every column except 'index' if None
 
         return : Dataframe
         """
         try:
             logger.info(f"Requesting data from databse table : {table_name}")
 
-            return pd.read_sql_table(table_name=table_name,con=self.conn).drop(['index'],axis=1)
+            columns = self._table_columns(table_name) if columns is None else columns
+            frames = list(self.iter_from_database(table_name, chunksize=self.chunksize, columns=columns))
+            if not frames:
+                return pd.DataFrame(columns=columns)
+
+            # arrow backed chunks are concatenated without copying underlying buffers
+            return pd.concat(frames, ignore_index=True, copy=False)
         
         except Exception as e:
             logger.error(f"Failed to load data from database table: {table_name}")
             raise e
         
+    def iter_from_database(
+            self,
+            table_name: str,
+            chunksize: int = None,
+            columns: list[str] = None,
+            key: str = None,
+            after = None,
+            where: str = None,
+            params: dict = None,
+        ):
+        """
+        This function yields dataset from given database table in chunks of pd.Dataframe using
+        server side cursor, so only single chunk is held in memory at any time
+
+        Args:
+            table_name : 'traindata' | 'testdata'
+            chunksize : maximum number of rows in single chunk, 'chunksize' from config if None
+            columns : columns to select, all columns if None
+            key : monotonic column to order rows by
+            after : only rows with key greater than after are loaded
+            where : additional SQL condition e.g. "label = :label"
+            params : values for bound parameters used in where
+
+        yield : Dataframe
+        """
+        from sqlalchemy import text
+
+        chunksize = self.chunksize if chunksize is None else chunksize
+
+        selected = '*' if columns is None else ', '.join(f'"{column}"' for column in columns)
+        query = f'SELECT {selected} FROM "{table_name}"'
+        params = {} if params is None else dict(params)
+        conditions = [] if where is None else [f'({where})']
+        if key is not None and after is not None:
+            conditions.append(f'"{key}" > :after')
+            params['after'] = after
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        if key is not None:
+            query += f' ORDER BY "{key}"'
+
+        try:
+            logger.info(f"Requesting chunks of {chunksize} rows from databse table : {table_name}")
+
+            with self.connection(stream_results=True, max_row_buffer=chunksize) as connection:
+                yield from pd.read_sql(
+                    text(query),
+                    con=connection,
+                    params=params,
+                    chunksize=chunksize,
+                    dtype_backend=self.dtype_backend,
+                )
+
+        except Exception as e:
+            logger.error(f"Failed to load chunks from database table: {table_name}")
+            raise e
+
     def frame_to_database(self, frame: pd.DataFrame, name:str ) -> None:
         """
         loads data to 'Train_Data' or 'Test_Data' tables specify name accordingly
@@ -119,15 +332,111 @@ class PostgreSqlDatabaseHandler(DatabaseHandler):
         """
         try:
             logger.info(f"Updating table : {name} with new dataframe")
-            frame.to_sql(name, con=self.conn ,if_exists='replace')
+            frame.to_sql(name, con=self.conn ,if_exists='replace', method=copy_insert, chunksize=self.copy_chunksize)
         
         except Exception as e:
             logger.error(f"Failed to update data on table : {name}")
             raise e
 
+    def append_frame_to_database(self, frame: pd.DataFrame, name: str) -> None:
+        """
+        appends dataframe to table with COPY inside single transaction, 'index' column continues
+        from current maximum so it stays usable as monotonic key
+
+        Args:
+            frame : Dataframe to append
+            name : 'traindata' | 'testdata' | 'infer_data'
+
+        Output : None
+        """
+        from sqlalchemy import text , inspect
+
+        try:
+            logger.info(f"Appending {len(frame)} rows on table : {name}")
+
+            with self.conn.begin() as connection:
+                # serialize appenders of same table so index ranges never overlap
+                connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {'name': name})
+
+                start = 0
+                if inspect(connection).has_table(name):
+                    start = connection.execute(text(f'SELECT COALESCE(MAX("index") + 1, 0) FROM "{name}"')).scalar()
+
+                frame = frame.set_axis(pd.RangeIndex(start, start + len(frame)), axis=0)
+                frame.to_sql(name, con=connection, if_exists='append', method=copy_insert, chunksize=self.copy_chunksize)
+
+        except Exception as e:
+            logger.error(f"Failed to append data on table : {name}")
+            raise e
+
+    def load_checkpoint(self, job: str, checkpoint_table: str) -> dict:
+        """
+        Returns last checkpoint of resumable job
+
+        Args:
+            job : job identifier e.g. '<source table>:<model version>'
+            checkpoint_table : table holding checkpoints
+
+        Output : {'last_key' : last written key, 'rows' : rows written so far}, None if job never wrote one
+        """
+        from sqlalchemy import text , inspect
+
+        try:
+            with self.connection() as connection:
+                if not inspect(connection).has_table(checkpoint_table):
+                    return None
+                row = connection.execute(
+                    text(f'SELECT last_key, rows FROM "{checkpoint_table}" WHERE job = :job'),
+                    {'job': job},
+                ).first()
+            return None if row is None else {'last_key': row[0], 'rows': row[1]}
+
+        except Exception as e:
+            logger.error(f"Failed to load checkpoint of job : {job}")
+            raise e
+
+    def append_with_checkpoint(self, frame: pd.DataFrame, name: str, job: str, checkpoint_table: str, last_key, rows: int) -> None:
+        """
+        appends dataframe with COPY and upserts checkpoint of job in same transaction, so rows of
+        killed job are either written together with their checkpoint or not at all
+
+        Args:
+            frame : Dataframe to append, written without index
+            name : output table
+            job : job identifier e.g. '<source table>:<model version>'
+            checkpoint_table : table holding checkpoints, created if missing
+            last_key : key of last source row covered by frame
+            rows : total rows written by job including frame
+
+        Output : None
+        """
+        from sqlalchemy import text
+
+        try:
+            logger.info(f"Appending {len(frame)} rows on table : {name} with checkpoint of job : {job}")
+
+            with self.conn.begin() as connection:
+                connection.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS "{checkpoint_table}" '
+                    '(job TEXT PRIMARY KEY, last_key BIGINT NOT NULL, rows BIGINT NOT NULL, updated_at TIMESTAMPTZ NOT NULL)'
+                ))
+                frame.to_sql(name, con=connection, if_exists='append', index=False, method=copy_insert, chunksize=self.copy_chunksize)
+                connection.execute(
+                    text(
+                        f'INSERT INTO "{checkpoint_table}" (job, last_key, rows, updated_at) VALUES (:job, :last_key, :rows, now()) '
+                        'ON CONFLICT (job) DO UPDATE SET last_key = EXCLUDED.last_key, rows = EXCLUDED.rows, updated_at = EXCLUDED.updated_at'
+                    ),
+                    {'job': job, 'last_key': int(last_key), 'rows': int(rows)},
+                )
+
+        except Exception as e:
+            logger.error(f"Failed to append data with checkpoint on table : {name}")
+            raise e
+
     def add_to_database(self, headline: str, outcome: bool, name:str) -> None:
         """
-        loads single record to 'Train_Data' or 'Test_Data' tables specify name accordingly
+        loads single record to 'Train_Data' or 'Test_Data' tables specify name accordingly, record
+        is buffered by process wide BufferedAppender and written with COPY in batches
 
         Args:
             headline : news headline
@@ -137,11 +446,7 @@ class PostgreSqlDatabaseHandler(DatabaseHandler):
         Output : None
         """
         try:
-
-            fr = pd.DataFrame([[headline][outcome]] , columns=['headline','label'])
-            
-            logger.info(f'Adding new data on table : {name}')
-            fr.to_sql(con=self.conn, name=name, if_exists='append')
+            BufferedAppender.from_config(self, name).append(headline, outcome)
         
         except Exception as e:
             logger.error(f"Failed to add new data on table : {name}")
@@ -156,17 +461,26 @@ class MongoDatabaseHandler(DatabaseHandler):
                 "host" : host,
                 "user" : user,
                 "password" : password,
-                "database" : database
+                "database" : database,
+                "batch_size" : batch_size
             }
+            client : already connected pymongo compatible client e.g. mongomock.MongoClient()
 
         return MongoDatabaseHandler
     """
 
-    def __init__(self, config: dict) -> None:
+    def __init__(self, config: dict = None, client = None) -> None:
+        if config is None:
+            config = read_yaml_config('config/database_config.yaml')['MongoConfig']
         super().__init__(config)
 
-        self.conn = pymongo.MongoClient(f"mongodb://{self.user}:{self.password}@{self.host}:27017/")
-        self.conn = self.conn[self.database]
+        self.batch_size = config.get('batch_size', 10000)
+
+        self.url = f"mongodb://{self.user}:{self.password}@{self.host}:27017/"
+        if client is None:
+            client = get_mongo_client(self.url)
+        self.conn = client[self.database]
+        logger.info(f"Using MongoDB Database handler on host : {self.host}")
 
 
     def get_db_connection(self):
@@ -179,21 +493,80 @@ class MongoDatabaseHandler(DatabaseHandler):
             raise e
 
 
-    def load_from_database(self,name:str,) -> pd.DataFrame:
+    def load_from_database(self,name:str, columns: list[str] = None) -> pd.DataFrame:
         """
         This function loads dataset from givem database into pd.Dataframe
 
         Args:
             name = 'traindata'|'testdata'
+            columns : fields to load, every field except '_id' if None
 
         return : Dataframe
         """
         try:
-        
-            #TODO implementatioin pending
-            pass
+            logger.info(f"Requesting data from database collection : {name}")
+
+            frames = list(self.iter_from_database(name, columns=columns))
+            if not frames:
+                return pd.DataFrame(columns=columns)
+
+            return pd.concat(frames, ignore_index=True)
         
         except Exception as e:
+            logger.error(f"Failed to load data from database collection: {name}")
+            raise e
+
+    def iter_from_database(
+            self,
+            name: str,
+            chunksize: int = None,
+            columns: list[str] = None,
+            key: str = None,
+            after = None,
+            where: dict = None,
+            params: dict = None,
+        ):
+        """
+        This function yields documents of given collection in chunks of pd.Dataframe, cursor
+        fetches batch_size documents per round trip and only projected fields are transferred
+
+        Args:
+            name : 'traindata' | 'testdata'
+            chunksize : maximum number of documents in single chunk, 'batch_size' from config if None
+            columns : fields to select, every field except '_id' if None
+            key : monotonic field to sort documents by
+            after : only documents with key greater than after are loaded
+            where : additional mongo filter document e.g. {'label': 'positive'}
+            params : unused, kept for compatibility with sql handlers
+
+        yield : Dataframe
+        """
+        chunksize = self.batch_size if chunksize is None else chunksize
+
+        query = {} if where is None else dict(where)
+        if key is not None and after is not None:
+            query[key] = {'$gt': after}
+
+        projection = {'_id': 0}
+        if columns is not None:
+            projection.update({column: 1 for column in columns})
+
+        try:
+            cursor = self.conn[name].find(query, projection, batch_size=chunksize)
+            if key is not None:
+                cursor = cursor.sort(key, 1)  # pymongo.ASCENDING
+
+            chunk = []
+            for document in cursor:
+                chunk.append(document)
+                if len(chunk) >= chunksize:
+                    yield pd.DataFrame.from_records(chunk, columns=columns)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame.from_records(chunk, columns=columns)
+
+        except Exception as e:
+            logger.error(f"Failed to load chunks from database collection: {name}")
             raise e
         
     def frame_to_database(self, frame: pd.DataFrame, name:str ) -> None:
@@ -207,18 +580,38 @@ class MongoDatabaseHandler(DatabaseHandler):
         Output : None
         """
         try:
-            records = []
-            for i in range(frame.shape[0]):
-                records.append({'headline':frame.iloc[i]['headline'],'label':frame.iloc[i]['label']})
-            
-            self.conn[name].insert_many(records)
+            logger.info(f"Updating collection : {name} with new dataframe")
+            self.append_frame_to_database(frame.loc[:, ['headline', 'label']], name)
         
         except Exception as e:
+            logger.error(f"Failed to update data on collection : {name}")
+            raise e
+
+    def append_frame_to_database(self, frame: pd.DataFrame, name: str) -> None:
+        """
+        inserts every row of dataframe as document with unordered insert_many in batches of batch_size
+
+        Args:
+            frame : Dataframe to append
+            name : 'traindata' | 'testdata' | 'infer_data' collection name
+
+        Output : None
+        """
+        try:
+            collection = self.conn[name]
+            for start in range(0, frame.shape[0], self.batch_size):
+                # to_dict converts whole batch at once and returns native python values
+                records = frame.iloc[start:start + self.batch_size].to_dict('records')
+                collection.insert_many(records, ordered=False)
+
+        except Exception as e:
+            logger.error(f"Failed to append data on collection : {name}")
             raise e
 
     def add_to_database(self, headline: str, outcome: bool, name:str) -> None:
         """
-        loads single record to 'Train_Data' or 'Test_Data' tables specify name accordingly
+        loads single record to 'Train_Data' or 'Test_Data' tables specify name accordingly, record
+        is buffered by process wide BufferedAppender and inserted with insert_many in batches
 
         Args:
             headline : news headline
@@ -228,11 +621,300 @@ class MongoDatabaseHandler(DatabaseHandler):
         Output : None
         """
         try:
-
-            #TODO implementatioin pending
-            pass
+            BufferedAppender.from_config(self, name).append(headline, outcome)
         
         except Exception as e:
+            logger.error(f"Failed to add new data on collection : {name}")
             raise e
 
-    
\ No newline at end of file
+
+# process wide appenders keyed by (database url, table), records added by every handler of same
+# database are buffered together
+_appenders = {}
+_appenders_lock = threading.Lock()
+
+
+class BufferedAppender:
+    """
+    Accumulates records in memory and appends them to database in batches, buffer is flushed
+    once it holds max_rows records or its oldest record is max_interval seconds old
+
+    Every flush is single append_frame_to_database call (one transaction on PostgreSQL), records
+    of failed flush stay buffered and are retried by next flush, remaining records are flushed
+    by close() which is also registered to run at interpreter exit.
+
+    Usage:
+        with BufferedAppender(PostgreSqlDatabaseHandler(), 'infer_data') as appender:
+            appender.append(headline, label)
+    """
+
+    def __init__(
+            self,
+            handler: DatabaseHandler,
+            name: str,
+            columns: list[str] = ['headline', 'label'],
+            max_rows: int = 1000,
+            max_interval: float = 5.0,
+        ) -> None:
+        """
+        Args:
+            handler : DatabaseHandler implementing append_frame_to_database
+            name : table / collection name
+            columns : column names of appended records
+            max_rows : number of buffered records triggering flush
+            max_interval : seconds after which buffered records are flushed
+        """
+        import atexit
+
+        self.handler = handler
+        self.name = name
+        self.columns = columns
+        self.max_rows = max_rows
+        self.max_interval = max_interval
+
+        self._rows = []
+        self._oldest = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._timer = threading.Thread(target=self._flush_periodically, name='BufferedAppender', daemon=True)
+        self._timer.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, handler: DatabaseHandler, name: str, config: dict = None):
+        """
+        Returns process wide appender of handler database and given table configured by
+        BufferedAppender section of 'config/database_config.yaml', created on first call
+        """
+        if config is None:
+            config = read_yaml_config('config/database_config.yaml').get('BufferedAppender', {})
+
+        key = (handler.url, name)
+        with _appenders_lock:
+            appender = _appenders.get(key)
+            if appender is None or appender._closed.is_set():
+                appender = _appenders[key] = cls(
+                    handler,
+                    name,
+                    max_rows = config.get('max_rows', 1000),
+                    max_interval = config.get('max_interval', 5.0),
+                )
+        return appender
+
+    def append(self, *values) -> None:
+        """
+        buffers single record, values are given in order of columns
+        """
+        with self._lock:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(values)
+            full = len(self._rows) >= self.max_rows
+
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        writes every buffered record to database in single batch
+        """
+        with self._flush_lock:
+            with self._lock:
+                rows, self._rows = self._rows, []
+                self._oldest = None
+
+            if not rows:
+                return
+
+            try:
+                self.handler.append_frame_to_database(pd.DataFrame(rows, columns=self.columns), self.name)
+            except Exception as e:
+                # keep records buffered so next flush retries them
+                with self._lock:
+                    self._rows = rows + self._rows
+                    self._oldest = time.monotonic()
+                raise e
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(min(self.max_interval, 1.0)):
+            with self._lock:
+                due = self._oldest is not None and time.monotonic() - self._oldest >= self.max_interval
+            if due:
+                try:
+                    self.flush()
+                except Exception as e:
+                    logger.error(f"Periodic flush on table : {self.name} failed with {e}")
+
+    def close(self) -> None:
+        """
+        stops periodic flushing and writes remaining records
+        """
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._timer.join()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {len(self._rows)} buffered records on table : {self.name}")
+            raise e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# process wide result writers keyed by (database url, table), shared by every pipeline so each
+# results table has single writer thread per process
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+class AsyncResultWriter:
+    """
+    Persists inference results (headline, label, model_version, created_at) from background thread
+
+    submit() only puts batch on bounded queue and never blocks, batches are dropped (and counted)
+    when queue is full so persistence never adds latency to predictions. Writer thread combines
+    queued batches into single multi-row append of up to batch_size rows, remaining results are
+    flushed by close() which is also registered to run at interpreter exit.
+
+    Usage:
+        writer = AsyncResultWriter.from_config(PostgreSqlDatabaseHandler())
+        writer.submit(headlines, labels, model_version)
+    """
+
+    COLUMNS = ['headline', 'label', 'model_version', 'created_at']
+    _STOP = object()
+
+    def __init__(
+            self,
+            handler: DatabaseHandler,
+            name: str = 'infer_data',
+            max_queue: int = 1000,
+            batch_size: int = 5000,
+            max_interval: float = 2.0,
+        ) -> None:
+        """
+        Args:
+            handler : DatabaseHandler implementing append_frame_to_database
+            name : results table / collection name
+            max_queue : maximum number of submitted batches waiting to be written
+            batch_size : maximum number of rows written by single append
+            max_interval : seconds writer waits for more batches before writing partial one
+        """
+        import atexit
+
+        self.handler = handler
+        self.name = name
+        self.batch_size = batch_size
+        self.max_interval = max_interval
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._counter_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name='AsyncResultWriter', daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def from_config(cls, handler: DatabaseHandler, config: dict = None):
+        """
+        Returns process wide writer configured by ResultWriter section of 'config/database_config.yaml',
+        created on first call for handler database and table and shared by later calls, None if disabled
+        """
+        if config is None:
+            config = read_yaml_config('config/database_config.yaml').get('ResultWriter', {})
+        if not config.get('enabled', False):
+            return None
+
+        key = (handler.url, config['table'])
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None or writer._closed:
+                writer = _writers[key] = cls(
+                    handler,
+                    name = config['table'],
+                    max_queue = config['max_queue'],
+                    batch_size = config['batch_size'],
+                    max_interval = config['max_interval'],
+                )
+        return writer
+
+    def submit(self, headlines: list[str], labels: list, model_version: str) -> bool:
+        """
+        Queues predicted batch for writing without blocking, returns False if batch was dropped
+        """
+        if self._closed:
+            return False
+        created_at = datetime.datetime.now(datetime.timezone.utc)
+        try:
+            self._queue.put_nowait((list(headlines), list(labels), model_version, created_at))
+            return True
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += len(headlines)
+            logger.warning(f"Result writer queue is full, dropped {len(headlines)} results of table : {self.name}")
+            return False
+
+    def _write(self, batches: list) -> None:
+        rows = [
+            (headline, label, model_version, created_at)
+            for headlines, labels, model_version, created_at in batches
+            for headline, label in zip(headlines, labels)
+        ]
+        try:
+            self.handler.append_frame_to_database(pd.DataFrame(rows, columns=self.COLUMNS), self.name)
+            with self._counter_lock:
+                self.written += len(rows)
+        except Exception as e:
+            # results are best effort, failed batch is counted and never retried to keep memory bounded
+            with self._counter_lock:
+                self.failed += len(rows)
+            logger.error(f"Writing {len(rows)} results on table : {self.name} failed with {e}")
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+
+            batches = [item]
+            rows = len(item[0])
+            deadline = time.monotonic() + self.max_interval
+            while rows < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batches.append(item)
+                rows += len(item[0])
+
+            self._write(batches)
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            return {'written': self.written, 'dropped': self.dropped, 'failed': self.failed, 'queued': self._queue.qsize()}
+
+    def close(self) -> None:
+        """
+        Stops accepting results and waits until every queued result is written
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(self._STOP)
+        self._worker.join()
+        logger.info(f"Result writer closed with {self.stats()}")
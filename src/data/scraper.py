@@ -1,8 +1,20 @@
 import os
+import json
+import time
+import random
+import sqlite3
+import threading
 from abc import ABC , abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup , SoupStrainer
 from src import logger
+from src.utils import read_yaml_config , headline_fingerprint
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
 
 class Scraper(ABC):
     """
@@ -14,16 +26,215 @@ class Scraper(ABC):
         function to request scrap headline titles from url given
         """
 
+    def listing_urls(self) -> list[str]:
+        """
+        function returning every page url which should be fetched by ScraperEngine
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} cannot be used with ScraperEngine")
+
+    def parse_headlines(self, html: str) -> list[str]:
+        """
+        function extracting headlines from html of single page fetched by ScraperEngine
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} cannot be used with ScraperEngine")
+
+
+class ScraperEngine:
+    def __init__(self, sources: list[Scraper], config: dict = None, validators_path: str = None) -> None:
+        """
+        Fetches listing pages of many scrapers concurrently over pooled keep-alive session
+
+        Args:
+            sources : scrapers implementing listing_urls and parse_headlines
+            config : ScraperEngine section of 'config/scraper_config.yaml' if None
+            validators_path : json file persisting ETag / Last-Modified of pages, when given
+                              pages are requested conditionally and unchanged pages are skipped
+        """
+        if config is None:
+            config = read_yaml_config('config/scraper_config.yaml')['ScraperEngine']
+
+        self.sources = sources
+        self.max_workers = config['max_workers']
+        self.per_host_limit = config['per_host_limit']
+        self.timeout = config['timeout']
+        self.retries = config['retries']
+        self.backoff = config['backoff']
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = config['user_agent']
+
+        self._lock = threading.Lock()
+        self._host_limits = {}
+
+        self.validators_path = validators_path
+        self.validators = {}
+        if validators_path is not None and os.path.exists(validators_path):
+            with open(validators_path, 'r') as file:
+                self.validators = json.load(file)
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._host_limits.setdefault(host, threading.BoundedSemaphore(self.per_host_limit))
+
+    def fetch(self, url: str, headers: dict = None) -> requests.Response:
+        """
+        function requesting single url, failed requests are retried with jittered exponential backoff
+
+        Args:
+            url : page url
+            headers : additional request headers
+
+        return : requests.Response
+        """
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                with self._host_limit(url):
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                if response.status_code not in RETRY_STATUS:
+                    return response
+                error = Exception(f'Cannot reach web servers, error code : {response}')
+            except requests.RequestException as e:
+                error = e
+
+            if attempt < self.retries:
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                logger.info(f"Retrying {url} in {delay:.2f}s after : {error}")
+                time.sleep(delay)
+
+        raise error
+
+    def _conditional_headers(self, url: str) -> dict:
+        with self._lock:
+            validator = self.validators.get(url, {})
+        headers = {}
+        if 'etag' in validator:
+            headers['If-None-Match'] = validator['etag']
+        if 'last_modified' in validator:
+            headers['If-Modified-Since'] = validator['last_modified']
+        return headers
+
+    def _remember_validators(self, url: str, response: requests.Response) -> None:
+        validator = {}
+        if 'ETag' in response.headers:
+            validator['etag'] = response.headers['ETag']
+        if 'Last-Modified' in response.headers:
+            validator['last_modified'] = response.headers['Last-Modified']
+        with self._lock:
+            if validator:
+                self.validators[url] = validator
+            else:
+                self.validators.pop(url, None)
+
+    def save_validators(self) -> None:
+        """
+        function persisting page validators so conditional requests survive restarts
+        """
+        if self.validators_path is None:
+            return
+        os.makedirs(os.path.dirname(self.validators_path) or '.', exist_ok=True)
+        with self._lock:
+            content = json.dumps(self.validators)
+        tmp_path = f"{self.validators_path}.tmp"
+        with open(tmp_path, 'w') as file:
+            file.write(content)
+        os.replace(tmp_path, self.validators_path)
+
+    def _scrape_page(self, source: Scraper, url: str) -> list[str]:
+        logger.info(f"Requesting current headlines from : {url}")
+        conditional = self.validators_path is not None
+        req = self.fetch(url, headers=self._conditional_headers(url) if conditional else None)
+
+        if conditional and req.status_code == 304:
+            logger.info(f"Page unchanged since last request : {url}")
+            return []
+        if not req.ok:
+            raise Exception(f'Cannot reach web servers, error code : {req}')
+        if conditional:
+            self._remember_validators(url, req)
+
+        return source.parse_headlines(req.text)
+
+    def get_headlines(self) -> list[str]:
+        """
+        function fetching every listing page of every source concurrently
+
+        Args: None
+
+        return : list[str] deduplicated headlines in page order
+        """
+        jobs = [(source, url) for source in self.sources for url in source.listing_urls()]
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self._scrape_page, source, url) for source, url in jobs]
+
+        headlines = []
+        seen = set()
+        failures = 0
+        for (_, url), future in zip(jobs, futures):
+            try:
+                page = future.result()
+            except Exception as e:
+                logger.error(f"Failed to get current headlines from {url} : {e}")
+                failures += 1
+                continue
+
+            for headline in page:
+                if headline not in seen:
+                    seen.add(headline)
+                    headlines.append(headline)
+
+        if jobs and failures == len(jobs):
+            raise Exception(f'Cannot reach web servers for any of {len(jobs)} pages')
+
+        return headlines
+
+    def close(self) -> None:
+        self.session.close()
+
 
 class MC_Scraper(Scraper):
-    def __init__(self) -> None:
+    def __init__(self, pages: int = None, url: str = None, incremental: bool = False) -> None:
         """
         This class for retrieving data drom money control website using web scraper primary url used is https://www.moneycontrol.com/news/business/stocks/'
+
+        Args:
+            pages : number of listing pages to scrape, 'pages' from config if None
+            url : first listing page, 'url' from config if None (e.g. local server for tests)
+            incremental : request pages conditionally and skip pages unchanged since last call
         """
         super().__init__()
 
-        self.url = 'https://www.moneycontrol.com/news/business/stocks/'
+        config = read_yaml_config('config/scraper_config.yaml')['MC_Scraper']
+        self.url = config['url'] if url is None else url
+        self.pages = config['pages'] if pages is None else pages
         self.headlines = []
+        self.incremental = incremental
+        self._engine = None
+
+    def listing_urls(self) -> list[str]:
+        """
+        function returning urls of first n listing pages
+        """
+        return [self.url] + [f"{self.url.rstrip('/')}/page-{page}/" for page in range(2, self.pages + 1)]
+
+    def parse_headlines(self, html: str) -> list[str]:
+        """
+        function extracting headline titles from listing page html
+        """
+        headlines = []
+        soup = BeautifulSoup(html, features='html.parser', parse_only=SoupStrainer('h2'))
+
+        for i in soup.find_all('h2'):
+            headline = i.find('a')
+            if headline is not None and headline.get('title'):
+                headlines.append(headline.get('title'))
+
+        return headlines
 
     def get_headlines(self) -> list[str]:
         """
@@ -33,24 +244,82 @@ class MC_Scraper(Scraper):
 
         return : list[str]
         """
-        try:
-            logger.info(f"Requesting current headlines from : {self.url}")
-            req = requests.get(self.url)
-            if not req.ok:
-                logger.error(f"Failed to get current headlines : {req}")
-                raise Exception(f'Cannot reach web servers, error code : {req}')
-        except Exception as e:
-            raise e
-        
-        soup = BeautifulSoup(req.text,features='html.parser')
-        soup = soup.find_all('h2')
-
-        for i in soup:
-            headline = i.find('a')
-            try:
-                headline = headline.get('title')
-                self.headlines.append(headline)
-            except:
-                pass
+        if self._engine is None:
+            validators_path = None
+            if self.incremental:
+                validators_path = read_yaml_config('config/scraper_config.yaml')['IncrementalScraping']['validators_path']
+            self._engine = ScraperEngine([self], validators_path=validators_path)
 
+        self.headlines = self._engine.get_headlines()
         return self.headlines
+
+    def commit(self) -> None:
+        """
+        function persisting page validators of last incremental call, call it once headlines are
+        processed downstream so failed runs fetch same pages again
+        """
+        if self._engine is not None:
+            self._engine.save_validators()
+
+
+class SeenHeadlineIndex:
+    def __init__(self, path: str = None) -> None:
+        """
+        Persistent index of fingerprints of already seen headlines stored in local sqlite file
+
+        Args:
+            path : sqlite file, 'seen_index_path' from 'config/scraper_config.yaml' if None
+        """
+        if path is None:
+            path = read_yaml_config('config/scraper_config.yaml')['IncrementalScraping']['seen_index_path']
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS seen (fingerprint TEXT PRIMARY KEY, first_seen REAL)')
+
+    def filter_new(self, headlines: list[str]) -> list[str]:
+        """
+        function returning headlines which were never marked as seen, duplicates within given list are dropped
+
+        Args:
+            headlines : list[str]
+
+        return : list[str]
+        """
+        fingerprints = [headline_fingerprint(headline) for headline in headlines]
+        known = set()
+
+        with self._lock:
+            unique = list(dict.fromkeys(fingerprints))
+            for start in range(0, len(unique), 500):
+                batch = unique[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT fingerprint FROM seen WHERE fingerprint IN ({','.join('?' * len(batch))})", batch
+                )
+                known.update(row[0] for row in rows)
+
+        new = []
+        for headline, fingerprint in zip(headlines, fingerprints):
+            if fingerprint not in known:
+                known.add(fingerprint)
+                new.append(headline)
+
+        logger.info(f"Found {len(new)} new headlines out of {len(headlines)}")
+        return new
+
+    def mark_seen(self, headlines: list[str]) -> None:
+        """
+        function storing fingerprints of given headlines, call once headlines are processed downstream
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO seen (fingerprint, first_seen) VALUES (?, ?)',
+                [(headline_fingerprint(headline), now) for headline in headlines],
+            )
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,16 +1,20 @@
 from abc import ABC , abstractmethod
-from sklearn.tree import DecisionTreeClassifier as DT
-from sklearn.metrics import accuracy_score,precision_score,recall_score,f1_score
 import pickle
 import os
 from typing import Literal
 from src import logger
 from src.utils import read_yaml_config
+from src.utils.artifacts import registry
+from src.utils.bundle import load_bundle
 
 class ClassifierModel(ABC):
     """
     """
 
+    # preprocessing model is built for, used by pipelines when steps are not given
+    vectorizer = 'CountVectTransformer'
+    encoded_labels = True
+
     @abstractmethod
     def train_model(self, x_train , y_train ,save:bool):
         """
@@ -18,27 +22,138 @@ class ClassifierModel(ABC):
         """
         raise NotImplementedError
 
-    @abstractmethod
+    def save_model(self) -> None:
+        """
+        saves model as pickle file on configured filepath
+        """
+        os.makedirs(os.path.dirname(self.filepath) or '.', exist_ok=True)
+        with open(self.filepath, 'wb') as file:
+            logger.info(f"Saving model file on path : {self.filepath}")
+            pickle.dump(self.model, file)
+        registry.put(self.filepath, self.model)
+
     def test_model(self,x_test , y_test):
         """
-        Method to test model on given data
+        method to test model on given test data
+
+        Args:
+            x_test : vectorized test data
+            y_test : true labels
+
+        output : (accuracy , precision , recall, f1 score)
         """
-        raise NotImplementedError
+        from sklearn.metrics import accuracy_score,precision_score,recall_score,f1_score
 
+        logger.info(f"Model evaluation has initiated")
+        y_pred = self.model.predict(x_test)
+        accuracy_scored = accuracy_score(y_test,y_pred)
+        precision_scored = precision_score(y_test,y_pred,average='weighted')
+        recall_scored = recall_score(y_test,y_pred,average='weighted')
+        f1_scored = f1_score(y_test,y_pred,average='weighted')
+
+        logger.info(f"Model evaluation complete with accuracy : {accuracy_scored}")
+        self.accuracy = accuracy_scored
+
+        return ( accuracy_scored , precision_scored , recall_scored , f1_scored )
 
-    @abstractmethod
     def predict_sentiment(self,headline):
         """
-        run prediction on single headline
+        Method to run inference on single headline
+
+        Args:
+            headline : headline string, vectorized with vectorizer model is built for, or single
+                       row of its output
+
+        output : predicted label, decoded with LabelTransformer for models trained on encoded labels
         """
-        raise NotImplementedError
+        logger.info(f"Running inference for single headline")
+        if isinstance(headline, str):
+            from src.preprocess import vectorizer_from_config
+            headline = vectorizer_from_config(self.vectorizer)().transform([headline])
+        label = self.model.predict(headline)[0]
+        if self.encoded_labels:
+            from src.preprocess import LabelTransformer
+            label = LabelTransformer(save=False).inverse_transform([label])[0]
+        return label
 
-    @abstractmethod
     def predict_onFrame(self,headlines):
         """
-        run prediction on multiple headlines
+        Method to run inference on multiple vectorized headlines
+
+        Args:
+            headlines : sparse matrix
+
+        output : list[ predicted labels ]
         """
-        raise NotImplementedError
+        logger.info(f"Running inference for multiple headlines")
+        return self.model.predict(headlines)
+
+    def get_params(self):
+        return self.model.get_params()
+
+    def partial_fit(self, x_train, y_train, classes=None):
+        """
+        method to update model with single chunk of training data, only for incremental models
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} does not support incremental training")
+
+    def report(self, x_test, single_samples: int = 100) -> dict:
+        """
+        method to measure serialized size and predict latency of trained model
+
+        Args:
+            x_test : vectorized data used for timing
+            single_samples : number of single record predictions timed
+
+        output : dict(model_size_bytes, batch_latency_ms_per_row, single_latency_ms)
+        """
+        import time
+
+        size = len(pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL))
+
+        start = time.perf_counter()
+        self.model.predict(x_test)
+        batch = (time.perf_counter() - start) / max(x_test.shape[0], 1)
+
+        samples = min(single_samples, x_test.shape[0])
+        start = time.perf_counter()
+        for i in range(samples):
+            self.model.predict(x_test[i:i + 1])
+        single = (time.perf_counter() - start) / max(samples, 1)
+
+        report = {
+            'model_size_bytes': size,
+            'batch_latency_ms_per_row': batch * 1000,
+            'single_latency_ms': single * 1000,
+        }
+        logger.info(f"{self.__class__.__name__} size : {size} bytes, batch latency : {batch * 1000:.4f} ms/row, single latency : {single * 1000:.4f} ms")
+        return report
+
+
+def build_decision_tree(params: dict):
+    """
+    returns untrained sklearn DecisionTreeClassifier from DecisionTreeClassifier section of
+    'config/model_config.yaml', 'None' strings are converted to None
+
+    Args:
+        params : dict of DecisionTreeClassifier parameters
+    """
+    from sklearn.tree import DecisionTreeClassifier as DT
+
+    return DT(
+        criterion = params['criterion'],
+        splitter = params['splitter'],
+        max_depth = None if params['max_depth'] == 'None' else params['max_depth'],
+        min_samples_split = params['min_samples_split'],
+        min_samples_leaf = params['min_samples_leaf'],
+        min_weight_fraction_leaf = params['min_weight_fraction_leaf'],
+        max_features = None if params['max_features'] == 'None' else params['max_features'],
+        random_state = None if params['random_state'] == 'None' else params['random_state'],
+        max_leaf_nodes = None if params['max_leaf_nodes'] == 'None' else params['max_leaf_nodes'],
+        min_impurity_decrease = params['min_impurity_decrease'],
+        class_weight = None if params['class_weight'] == 'None' else params['class_weight'],
+        ccp_alpha = params['ccp_alpha'],
+    )
 
 
 class DecisionTreeClassifier(ClassifierModel):
@@ -48,34 +163,20 @@ class DecisionTreeClassifier(ClassifierModel):
 
         self.model = None
         self.accuracy = None
-        self.filepath = read_yaml_config('config/model_config.yaml')['FILEPATH']
+        config = read_yaml_config('config/model_config.yaml')
+        self.filepath = config['FILEPATH']
 
         # TODO : Create function to update model parameters
-        self.params = read_yaml_config('config/model_config.yaml')['DecisionTreeClassifier']
+        self.params = config['DecisionTreeClassifier']
 
         if os.path.exists(self.filepath) :
-            with open(self.filepath, 'rb') as file:
-                logger.info(f"Loading model file from : {self.filepath}")
+            logger.info(f"Loading model file from : {self.filepath}")
 
-                # TODO : Implement exception handling for wrong filepath
-                self.model = pickle.load(file)
+            # TODO : Implement exception handling for wrong filepath
+            self.model = registry.get(self.filepath)
         else:
             logger.info(f"Using untrained model, filepath not provided")
-
-            self.model = DT(
-                criterion = self.params['criterion'],
-                splitter = self.params['splitter'],
-                max_depth = None if self.params['max_depth'] == 'None' else self.params['max_depth'],
-                min_samples_split = self.params['min_samples_split'],
-                min_samples_leaf = self.params['min_samples_leaf'],
-                min_weight_fraction_leaf = self.params['min_weight_fraction_leaf'],
-                max_features = None if self.params['max_features'] == 'None' else self.params['max_features'],
-                random_state = None if self.params['random_state'] == 'None' else self.params['random_state'],
-                max_leaf_nodes = None if self.params['max_leaf_nodes'] == 'None' else self.params['max_leaf_nodes'],
-                min_impurity_decrease = self.params['min_impurity_decrease'],
-                class_weight = None if self.params['class_weight'] == 'None' else self.params['class_weight'],
-                ccp_alpha = self.params['ccp_alpha'],
-            )
+            self.model = build_decision_tree(self.params)
 
 
     def train_model(self,x_train, y_train ,save:bool = True):
@@ -92,7 +193,11 @@ class DecisionTreeClassifier(ClassifierModel):
         """
         try:
             
+            from sklearn.base import clone
+
             logger.info("Training of classifier model has started!")        
+            # fit a fresh copy so model shared through artifact registry is never refitted in place
+            self.model = clone(self.model)
             hist = self.model.fit(x_train , y_train)    
             logger.info("Training of classifier model has Finished!")
 
@@ -102,67 +207,228 @@ class DecisionTreeClassifier(ClassifierModel):
             raise e
 
         if save:
-            with open(self.filepath, 'wb') as file:
-                logger.info(f"Saving model file on path : {self.filepath}")
-                pickle.dump(self.model, file)
+            self.save_model()
         
         return hist
     
     def test_model(self,x_test, y_test):
+        scores = super().test_model(x_test, y_test)
+        for score in scores:
+            print(score)
+        return scores
+
+
+class BundleTreeClassifier(ClassifierModel):
+    def __init__(self) -> None:
+        """
+        Decision tree served by pure NumPy engine from artifact bundle (BUNDLE_PATH of
+        'config/model_config.yaml'), predictions match DecisionTreeClassifier without importing sklearn
+
+        Model is trained by DecisionTreeClassifier and exported with `python main.py export`
         """
-        method to test model on given test data 
+        self.accuracy = None
+        self.filepath = None
+        self.bundle_path = read_yaml_config('config/model_config.yaml')['BUNDLE_PATH']
+
+    @property
+    def model(self):
+        # engine follows bundle re-exports through artifact registry
+        return load_bundle(self.bundle_path)['engine_model']
+
+    def train_model(self, x_train, y_train, save:bool = True):
+        raise NotImplementedError("BundleTreeClassifier is inference only, train DecisionTreeClassifier and export bundle")
+
+    def predict_sentiment(self,headline):
+        """
+        Method to run inference on single headline
 
         Args:
-            x_test : test data
-            y_test : true labels
+            headline : headline string, vectorized with bundle vectorizer, or single CSR row
 
-        output : (accuracy , precision , recall, f1 score)
+        output : predicted label, decoded with classes of bundle
         """
-        
-        logger.info(f"Model evaluation has initiated")
-        y_pred = self.model.predict(x_test)
-        accuracy_scored = accuracy_score(y_test,y_pred)
-        precision_scored = precision_score(y_test,y_pred,average='weighted')
-        recall_scored = recall_score(y_test,y_pred,average='weighted')
-        f1_scored = f1_score(y_test,y_pred,average='weighted')
+        from src.preprocess import BundleLabelTransformer
 
-        logger.info(f"Model evaluation complete with accuracy : {accuracy_scored}")
-        self.accuracy = accuracy_scored
-        print(accuracy_scored)
-        print(precision_scored)
-        print(recall_scored)
-        print(f1_scored)
+        if isinstance(headline, str):
+            headline = load_bundle(self.bundle_path)['engine_vectorizer'].transform([headline])
+        return BundleLabelTransformer().inverse_transform(self.model.predict(headline)[:1])[0]
 
-        return ( accuracy_scored , precision_scored , recall_scored , f1_scored )
-        
-    
-    def predict_sentiment(self,headline):
+    def get_params(self):
+        return load_bundle(self.bundle_path)['manifest']['model']['params']
+
+
+class LinearClassifierModel(ClassifierModel):
+    """
+    Base of sparse linear backends, model file and parameters are read from section of
+    'config/model_config.yaml' named by config_section, 'None' strings are converted to None
+    """
+
+    config_section = None
+
+    def __init__(self) -> None:
+        self.model = None
+        self.accuracy = None
+        config = read_yaml_config('config/model_config.yaml')
+        self.params = dict(config[self.config_section])
+        self.filepath = self.params.pop('filepath')
+
+        if os.path.exists(self.filepath) :
+            logger.info(f"Loading model file from : {self.filepath}")
+            self.model = registry.get(self.filepath)
+        else:
+            logger.info(f"Using untrained model, filepath not provided")
+            self.model = self._build({key: None if value == 'None' else value for key, value in self.params.items()})
+
+    @abstractmethod
+    def _build(self, params: dict):
+        """
+        returns untrained sklearn estimator for given params
+        """
+        raise NotImplementedError
+
+    def train_model(self,x_train, y_train ,save:bool = True):
         """
-        Method to run inference on single record i.e headline : str 
+        method to train model or train and save it as pickel file on given filepath if save == True
 
         Args:
-            headline : str
+            x_train : sparse training data
+            y_train : labels
+            save : (True | False) True
 
-        output : predicted label
+        output : model history
         """
-        logger.info(f"Running inference for headline : {headline}")
-        headline = [headline]
+        try:
+            from sklearn.base import clone
 
-        return self.model.predict(headline)
+            logger.info("Training of classifier model has started!")
+            self.model = clone(self.model)
+            hist = self.model.fit(x_train , y_train)
+            logger.info("Training of classifier model has Finished!")
 
+        except Exception as e:
+            logger.error(f"Cannot train classifier model")
+            raise e
+
+        if save:
+            self.save_model()
 
-    def predict_onFrame(self, headlines):
+        return hist
+
+
+class MultinomialNBModel(LinearClassifierModel):
+    """
+    Multinomial naive bayes on count features, fastest to train and smallest model
+    """
+
+    config_section = 'MultinomialNB'
+
+    def _build(self, params: dict):
+        from sklearn.naive_bayes import MultinomialNB
+        return MultinomialNB(**params)
+
+
+class LogisticRegressionModel(LinearClassifierModel):
+    """
+    Logistic regression on sparse features, use liblinear or saga solver for large vocabularies
+    """
+
+    config_section = 'LogisticRegression'
+
+    def _build(self, params: dict):
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(**params)
+
+
+class LinearSVCModel(LinearClassifierModel):
+    """
+    Linear support vector machine (liblinear) on sparse features
+    """
+
+    config_section = 'LinearSVC'
+
+    def _build(self, params: dict):
+        from sklearn.svm import LinearSVC
+        return LinearSVC(**params)
+
+
+class SGDClassifierModel(LinearClassifierModel):
+    """
+    Linear classifier trained with stochastic gradient descent, supports incremental training
+    with partial_fit so it can be updated chunk by chunk without loading whole dataset
+    """
+
+    config_section = 'SGDClassifier'
+    # trained by update on stateless hashing features and raw labels, so no shared artifact is refitted
+    vectorizer = 'HashingVectTransformer'
+    encoded_labels = False
+
+    def __init__(self) -> None:
+        super().__init__()
+        # model loaded through artifact registry is shared, updates work on private copy
+        self.model_copied = False
+
+    def _build(self, params: dict):
+        from sklearn.linear_model import SGDClassifier
+        return SGDClassifier(**params)
+
+    def is_fitted(self) -> bool:
+        """
+        returns True if model has seen any training data
+        """
+        return hasattr(self.model, 'classes_')
+
+    def partial_fit(self, x_train, y_train, classes=None):
         """
-        Method to run inference on multiple headlines 
+        method to update model with single chunk of training data
 
         Args:
-            headlines : list
+            x_train : chunk of training data
+            y_train : chunk of labels
+            classes : every possible label, only required on first call for untrained model
 
-        output : list[ predicted labels ]
+        output : model
         """
-        logger.info(f"Running inference for multiple headlines")
-        return self.model.predict(headlines)
-    
-    def get_params(self):
-        return self.model.get_params()
-    
\ No newline at end of file
+        try:
+            if not self.is_fitted():
+                from sklearn.base import clone
+
+                # copy so model shared through artifact registry is never updated in place
+                self.model = clone(self.model)
+                self.model_copied = True
+                return self.model.partial_fit(x_train, y_train, classes=classes)
+
+            if not self.model_copied:
+                import copy
+
+                # warm start keeps learned weights, copied once before first update
+                self.model = copy.deepcopy(self.model)
+                self.model_copied = True
+            return self.model.partial_fit(x_train, y_train)
+
+        except Exception as e:
+            logger.error(f"Cannot update classifier model with new chunk")
+            raise e
+
+
+# backends selectable with MODEL key of 'config/model_config.yaml'
+CLASSIFIERS = {
+    'DecisionTreeClassifier': DecisionTreeClassifier,
+    'MultinomialNB': MultinomialNBModel,
+    'LogisticRegression': LogisticRegressionModel,
+    'LinearSVC': LinearSVCModel,
+    'SGDClassifier': SGDClassifierModel,
+}
+
+
+def classifier_from_config(name: str = None) -> type:
+    """
+    returns ClassifierModel class selected by MODEL key of 'config/model_config.yaml'
+
+    Args:
+        name : backend name, read from config if None
+    """
+    if name is None:
+        name = read_yaml_config('config/model_config.yaml').get('MODEL', 'DecisionTreeClassifier')
+    if name not in CLASSIFIERS:
+        raise ValueError(f"Unknown MODEL : {name}, expected one of {list(CLASSIFIERS)}")
+    return CLASSIFIERS[name]
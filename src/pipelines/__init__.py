@@ -1,14 +1,49 @@
 from abc import ABC , abstractmethod
-from src.data.database import DatabaseHandler , PostgreSqlDatabaseHandler
-from src.preprocess import PreprocessStep , CountVectTransformer ,LabelTransformer
-from src.model import DecisionTreeClassifier ,ClassifierModel
+from src.data.database import DatabaseHandler , PostgreSqlDatabaseHandler , AsyncResultWriter
+from src.preprocess import PreprocessStep , CountVectTransformer , HashingVectTransformer , LabelTransformer , BundleVectTransformer , BundleLabelTransformer , vectorizer_from_config
+from src.model import DecisionTreeClassifier , SGDClassifierModel , ClassifierModel , BundleTreeClassifier , classifier_from_config
+from src.utils import read_yaml_config
+from src.utils.artifacts import registry
+from src.utils.bundle import export_bundle_from_config
+from src.utils.cache import PredictionCache
+from src.utils.features import FeatureCache , artifact_path
+from src.utils.instrumentation import StageMetrics
 import pandas as pd
-import mlflow
-from mlflow.sklearn import log_model
 import os
+import json
+import hashlib
+import numpy as np
 from src import logger
 
 
+def _export_bundle(x_steps: list, y_steps: list, classifier) -> None:
+    """
+    re-exports artifact bundle from artifacts just saved when bundle is configured, only
+    CountVectTransformer -> DecisionTreeClassifier -> LabelTransformer can be exported
+    """
+    if not (
+        [i.__class__ for i in x_steps] == [CountVectTransformer]
+        and [i.__class__ for i in y_steps] == [LabelTransformer]
+        and isinstance(classifier, DecisionTreeClassifier)
+    ):
+        return
+    export_bundle_from_config(
+        vectorizer = registry.get(x_steps[0].load_path),
+        encoder = registry.get(y_steps[0].load_path),
+        model = registry.get(classifier.filepath),
+    )
+
+
+def _default_steps(classifier: type, x_steps: list, y_steps: list) -> tuple[list, list]:
+    """
+    fills steps left None with VECTORIZER of 'config/model_config.yaml' (or vectorizer classifier is
+    built for) and LabelTransformer for classifiers trained on encoded labels
+    """
+    x_steps = [vectorizer_from_config(classifier.vectorizer)] if x_steps is None else x_steps
+    y_steps = ([LabelTransformer] if classifier.encoded_labels else []) if y_steps is None else y_steps
+    return x_steps , y_steps
+
+
 class Pipeline(ABC):
     """
     """
@@ -25,32 +60,171 @@ class TrainingPipeline(Pipeline):
     def __init__(
             self,
             d_handler: DatabaseHandler = PostgreSqlDatabaseHandler, 
-            x_steps: list[PreprocessStep] = [CountVectTransformer],
-            y_steps: list[PreprocessStep] = [LabelTransformer],
-            classifier: ClassifierModel = DecisionTreeClassifier,
+            x_steps: list[PreprocessStep] = None,
+            y_steps: list[PreprocessStep] = None,
+            classifier: ClassifierModel = None,
         ) -> None:
         """
         """
+        # backend selected by MODEL key of 'config/model_config.yaml' if None
+        classifier = classifier_from_config() if classifier is None else classifier
+        x_steps , y_steps = _default_steps(classifier, x_steps, y_steps)
         logger.info(f"Initiating training pipeline for model : {classifier.__name__} and {d_handler.__name__}")
         self.data_handler = d_handler()
         self.steps_on_x = [i() for i in x_steps]
         self.steps_on_y = [i() for i in y_steps]
         self.classifier = classifier()
+        self.instrumentation = read_yaml_config('config/model_config.yaml').get('Instrumentation', {})
+        self.feature_cache = FeatureCache.from_config()
+        self.metrics = None
 
     def run_pipeline(self) -> None:
         logger.info(f"Executing trainig pipeling with {self.data_handler.__class__.__name__}")
-        data = self.data_handler.load_from_database('traindata')
-        X = data['headline']
-        y = data['label']
-        for i in self.steps_on_x:
-            logger.info(f"Executing trainig pipeling with {i.__class__.__name__} for features")
-            X = i.fit_transform(X)
+        self.metrics = metrics = StageMetrics(self.__class__.__name__, self.instrumentation)
+
+        with metrics.profile():
+            with metrics.stage('load') as stage:
+                data = self.data_handler.load_from_database('traindata', columns=['headline', 'label'])
+                stage['rows'] = len(data)
+
+            cached = None
+            if self.feature_cache is not None:
+                with metrics.stage('feature_cache', rows=len(data)):
+                    key = self.feature_cache.key(data, self.steps_on_x, self.steps_on_y, fit=True)
+                    cached = self.feature_cache.get(key)
+
+            if cached is not None:
+                # artifacts of cached features are still on disk, steps need no refitting
+                X , y = cached
+            else:
+                X = data['headline']
+                y = data['label']
+                for i in self.steps_on_x:
+                    logger.info(f"Executing trainig pipeling with {i.__class__.__name__} for features")
+                    with metrics.stage(f"x.{i.__class__.__name__}", rows=len(data)):
+                        X = i.fit_transform(X)
+                for i in self.steps_on_y:
+                    logger.info(f"Executing trainig pipeling with {i.__class__.__name__} for labels")
+                    with metrics.stage(f"y.{i.__class__.__name__}", rows=len(data)):
+                        y = i.fit_transform(y)
+                if self.feature_cache is not None:
+                    self.feature_cache.put(key, X, y, [*self.steps_on_x, *self.steps_on_y])
+
+            with metrics.stage(f"fit.{self.classifier.__class__.__name__}", rows=len(data)):
+                model = self.classifier.train_model(X,y,save=True)
+            _export_bundle(self.steps_on_x, self.steps_on_y, self.classifier)
+
+        metrics.log_to_mlflow(run_name='training')
+        return model
+
+
+
+class IncrementalTrainingPipeline(Pipeline):
+
+    def __init__(
+            self,
+            d_handler: DatabaseHandler = PostgreSqlDatabaseHandler,
+            x_steps: list[PreprocessStep] = [HashingVectTransformer],
+            y_steps: list[PreprocessStep] = [],
+            classifier: ClassifierModel = SGDClassifierModel,
+        ) -> None:
+        """
+        Pipeline which streams labeled headlines from database in fixed size chunks and updates
+        classifier chunk by chunk with partial_fit, x_steps must be stateless and y_steps already
+        fitted (nothing is fitted on data), by default classifier is trained on raw labels.
+
+        If classifier was trained before, only rows added after last trained key are used (warm start)
+        """
+        logger.info(f"Initiating incremental training pipeline for model : {classifier.__name__} and {d_handler.__name__}")
+        model_config = read_yaml_config('config/model_config.yaml')
+        self.config = model_config['IncrementalTraining']
+        self.data_handler = d_handler()
+        self.steps_on_x = [i() for i in x_steps]
+        self.steps_on_y = [i() for i in y_steps]
+        self.classifier = classifier()
+        self.instrumentation = model_config.get('Instrumentation', {})
+        self.metrics = None
+
+    def _load_state(self) -> dict:
+        if not self.classifier.is_fitted():
+            return {'table': self.config['table'], 'last_key': None, 'rows': 0}
+        if not os.path.exists(self.config['state_path']):
+            # restarting from first row would train on already seen rows again on top of learned weights
+            raise RuntimeError(
+                f"Classifier {self.classifier.filepath} is already trained but update state "
+                f"{self.config['state_path']} is missing, remove model file to retrain from scratch"
+            )
+        with open(self.config['state_path'], 'r') as file:
+            state = json.load(file)
+        if state.get('table') == self.config['table']:
+            return state
+        return {'table': self.config['table'], 'last_key': None, 'rows': 0}
+
+    def _save_state(self, state: dict) -> None:
+        with open(self.config['state_path'], 'w') as file:
+            json.dump(state, file)
+
+    def run_pipeline(self) -> None:
+        table = self.config['table']
+        state = self._load_state()
+        logger.info(f"Executing incremental training pipeline on table : {table} after key : {state['last_key']}")
+        self.metrics = metrics = StageMetrics(self.__class__.__name__, self.instrumentation)
+
+        with metrics.profile():
+            rows = self._update(state, metrics)
+
+        if rows == 0:
+            logger.info(f"No new rows on table : {table} since last update")
+            return
+
+        state['rows'] += rows
+        self.classifier.save_model()
+        self._save_state(state)
+        metrics.log_to_mlflow(run_name='incremental-training')
+
+    def _update(self, state: dict, metrics: StageMetrics) -> int:
+        table = self.config['table']
+        key = self.config['key']
+
+        classes = [row[0] for row in self.data_handler.execute(f'SELECT DISTINCT label FROM "{table}"')]
         for i in self.steps_on_y:
-            logger.info(f"Executing trainig pipeling with {i.__class__.__name__} for labels")
-            y = i.fit_transform(y)
-        
-        return self.classifier.train_model(X,y,save=True)
+            # shared encoders of train are never refitted here
+            classes = i.transform(classes)
+
+        rows = 0
+        chunks = self.data_handler.iter_from_database(
+            table,
+            chunksize=self.config['chunksize'],
+            columns=['headline', 'label', key],
+            key=key,
+            after=state['last_key'],
+        )
+        while True:
+            # stages of every chunk are summed, 'load' is time spent waiting on database
+            with metrics.stage('load') as stage:
+                chunk = next(chunks, None)
+                stage['rows'] = 0 if chunk is None else len(chunk)
+            if chunk is None:
+                break
+
+            X = chunk['headline']
+            y = chunk['label']
+            for i in self.steps_on_x:
+                with metrics.stage(f"x.{i.__class__.__name__}", rows=len(chunk)):
+                    X = i.transform(X)
+            for i in self.steps_on_y:
+                with metrics.stage(f"y.{i.__class__.__name__}", rows=len(chunk)):
+                    y = i.transform(y)
 
+            with metrics.stage(f"fit.{self.classifier.__class__.__name__}", rows=len(chunk)):
+                self.classifier.partial_fit(X, y, classes=classes)
+
+            last_key = chunk[key].iloc[-1]
+            state['last_key'] = last_key.item() if hasattr(last_key, 'item') else last_key
+            rows += len(chunk)
+            logger.info(f"Updated classifier with {rows} new rows")
+
+        return rows
 
 
 class EvaluationPipeline(Pipeline):
@@ -58,29 +232,59 @@ class EvaluationPipeline(Pipeline):
     def __init__(
             self,
             d_handler: DatabaseHandler = PostgreSqlDatabaseHandler, 
-            x_steps: list[PreprocessStep] = [CountVectTransformer],
-            y_steps: list[PreprocessStep] = [LabelTransformer],
-            classifier: ClassifierModel = DecisionTreeClassifier,
+            x_steps: list[PreprocessStep] = None,
+            y_steps: list[PreprocessStep] = None,
+            classifier: ClassifierModel = None,
         ) -> None:
         """
         """
+        # backend selected by MODEL key of 'config/model_config.yaml' if None
+        classifier = classifier_from_config() if classifier is None else classifier
+        x_steps , y_steps = _default_steps(classifier, x_steps, y_steps)
         logger.info(f"Initiating evaluation pipeline for model : {classifier.__name__} and {d_handler.__name__}")
         self.data_handler = d_handler()
-        self.steps_on_x = x_steps
+        self.steps_on_x = [i() for i in x_steps]
         self.steps_on_y = [i() for i in y_steps]
         self.classifier = classifier()
+        self.instrumentation = read_yaml_config('config/model_config.yaml').get('Instrumentation', {})
+        self.feature_cache = FeatureCache.from_config()
+        self.metrics = None
 
     def run_pipeline(self,log_path) -> None:
+        self.metrics = metrics = StageMetrics(self.__class__.__name__, self.instrumentation)
+        with metrics.profile():
+            self._run(log_path, metrics)
+
+    def _run(self, log_path, metrics: StageMetrics) -> None:
         logger.info(f"Executing evaluation pipeling with {self.data_handler.__class__.__name__}")
-        data = self.data_handler.load_from_database('testdata')
-        X = data['headline']
-        y = data['label']
-        for i in self.steps_on_x:
-            logger.info(f"Executing evaluation pipeling with {i.__class__.__name__} for features")
-            X = i().transform(X)
-        for i in self.steps_on_y:
-            logger.info(f"Executing evaluation pipeling with {i.__class__.__name__} for features")
-            y = i.transform(y)
+        with metrics.stage('load') as stage:
+            data = self.data_handler.load_from_database('testdata', columns=['headline', 'label'])
+            stage['rows'] = len(data)
+
+        cached = None
+        if self.feature_cache is not None:
+            with metrics.stage('feature_cache', rows=len(data)):
+                key = self.feature_cache.key(data, self.steps_on_x, self.steps_on_y, fit=False)
+                cached = self.feature_cache.get(key)
+
+        if cached is not None:
+            X , y = cached
+        else:
+            X = data['headline']
+            y = data['label']
+            for i in self.steps_on_x:
+                logger.info(f"Executing evaluation pipeling with {i.__class__.__name__} for features")
+                with metrics.stage(f"x.{i.__class__.__name__}", rows=len(data)):
+                    X = i.transform(X)
+            for i in self.steps_on_y:
+                logger.info(f"Executing evaluation pipeling with {i.__class__.__name__} for features")
+                with metrics.stage(f"y.{i.__class__.__name__}", rows=len(data)):
+                    y = i.transform(y)
+            if self.feature_cache is not None:
+                self.feature_cache.put(key, X, y, [*self.steps_on_x, *self.steps_on_y])
+
+        import mlflow
+        from mlflow.sklearn import log_model
 
         try:
             logger.info(f"Executing evaluation pipeling with MLFlow experiment tracking")
@@ -90,7 +294,8 @@ class EvaluationPipeline(Pipeline):
                     self.classifier.get_params()
                 )
 
-                ( accuracy_scored , precision_scored , recall_scored , f1_scored ) = self.classifier.test_model(X,y)
+                with metrics.stage(f"predict.{self.classifier.__class__.__name__}", rows=len(data)):
+                    ( accuracy_scored , precision_scored , recall_scored , f1_scored ) = self.classifier.test_model(X,y)
 
                 mlflow.log_metrics({
                     'accuracy' : accuracy_scored,
@@ -98,6 +303,8 @@ class EvaluationPipeline(Pipeline):
                     'recall' : recall_scored,
                     'f1_score' : f1_scored
                 })
+                mlflow.log_metrics(self.classifier.report(X))
+                metrics.log_to_mlflow()
 
                 if not os.path.exists(log_path):
                     os.makedirs(log_path)
@@ -118,36 +325,560 @@ class InferencePipeline(Pipeline):
     def __init__(
             self,
             d_handler: DatabaseHandler = PostgreSqlDatabaseHandler, 
-            x_steps: list[PreprocessStep] = [CountVectTransformer],
-            y_steps: list[PreprocessStep] = [LabelTransformer],
-            classifier: ClassifierModel = DecisionTreeClassifier,
+            x_steps: list[PreprocessStep] = None,
+            y_steps: list[PreprocessStep] = None,
+            classifier: ClassifierModel = None,
+            cache: PredictionCache = None,
+            writer: AsyncResultWriter = None,
         ) -> None:
         """
+        Args:
+            x_steps, y_steps, classifier : selected by INFERENCE_ENGINE, MODEL and VECTORIZER keys of
+                    'config/model_config.yaml' if None
+            cache : PredictionCache in front of vectorize -> predict, configured from
+                    PredictionCache section of 'config/model_config.yaml' if None
+            writer : AsyncResultWriter persisting every prediction, process wide writer of
+                    ResultWriter section of 'config/database_config.yaml' if None
+            cache / writer set to False are disabled
         """
+        model_config = read_yaml_config('config/model_config.yaml')
+        if model_config.get('INFERENCE_ENGINE', 'sklearn') == 'numpy':
+            # exported bundle served by NumPy engine, sklearn is never imported
+            x_steps = [BundleVectTransformer] if x_steps is None else x_steps
+            y_steps = [BundleLabelTransformer] if y_steps is None else y_steps
+            classifier = BundleTreeClassifier if classifier is None else classifier
+        classifier = classifier_from_config() if classifier is None else classifier
+        x_steps , y_steps = _default_steps(classifier, x_steps, y_steps)
+
         logger.info(f"Initiating inference pipeline for model : {classifier.__name__} and {d_handler.__name__}")
         self.data_handler = d_handler()
-        self.steps_on_x = x_steps
+        self.steps_on_x = [i() for i in x_steps]
         self.steps_on_y = [i() for i in y_steps]
         self.classifier = classifier()
+        # False disables cache / writer regardless of config
+        self.cache = PredictionCache.from_config() if cache is None else (cache or None)
+        self.writer = AsyncResultWriter.from_config(self.data_handler) if writer is None else (writer or None)
+        self.instrumentation = model_config.get('Instrumentation', {})
+        self.metrics = None
+
+    def artifact_version(self) -> str:
+        """
+        Returns hash identifying currently loaded preprocess and model artifacts, changes whenever
+        any artifact file or preprocess config changes
+        """
+        parts = []
+        for i in [*self.steps_on_x, self.classifier, *self.steps_on_y]:
+            parts.append(i.__class__.__name__)
+            path = artifact_path(i)
+            if path is not None:
+                parts.append(registry.version(path))
+            parts.append(json.dumps(getattr(i, 'config', None), sort_keys=True, default=str))
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
 
     def run_pipeline(self,data : list[str]) -> None:
+        # kept on instance for last run only, aggregates over runs are in stage_registry
+        self.metrics = metrics = StageMetrics(self.__class__.__name__, self.instrumentation)
+        with metrics.profile():
+            return self._run(data, metrics)
+
+    def run_stream(self, records, batch_size: int = 1000, column: str = 'headline'):
+        """
+        Scores iterable of records in fixed size batches and yields (record, label) as soon as
+        each batch is predicted, only one batch is held in memory
+
+        Args:
+            records : iterable of dicts (e.g. iter_headline_records)
+            batch_size : number of records scored at once
+            column : field holding headline
+
+        yields : (record, label)
+        """
+        import itertools
+
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                return
+            labels = self.run_pipeline(data=[record[column] for record in batch])
+            yield from zip(batch, labels.tolist())
+
+    def _run(self, data : list[str], metrics: StageMetrics):
+        if self.cache is None and self.writer is None:
+            return self._predict(data, metrics)
+
+        data = list(data)
+        version = self.artifact_version()
+        labels = self._predict(data, metrics) if self.cache is None else self._cached_predict(data, version, metrics)
+
+        if self.writer is not None:
+            # only queued here, rows are written by writer thread
+            self.writer.submit(data, labels, version)
+        return labels
+
+    def _cached_predict(self, data : list[str], version: str, metrics: StageMetrics):
+        with metrics.stage('cache', rows=len(data)):
+            keys = [self.cache.key(headline, version) for headline in data]
+            cached = self.cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        logger.info(f"Prediction cache served {len(data) - len(missing)} of {len(data)} headlines")
+
+        if missing:
+            preds = self._predict([data[i] for i in missing], metrics)
+            predicted = {keys[i]: label for i, label in zip(missing, preds)}
+            self.cache.put_many(predicted)
+            cached.update(predicted)
+
+        return np.asarray([cached[key] for key in keys])
+
+    def _predict(self, data : list[str], metrics: StageMetrics):
         logger.info(f"Executing inference pipeline with {self.data_handler.__class__.__name__}")
         
         X = data
+        rows = len(data)
 
         for i in self.steps_on_x:
             logger.info(f"Executing inference pipeline with {i.__class__.__name__} for features")
-            X = i().transform(X)
+            with metrics.stage(f"x.{i.__class__.__name__}", rows=rows):
+                X = i.transform(X)
 
         try:
             logger.info(f"Executing inference pipeline with classifier : {self.classifier.__class__.__name__}")
-            preds = self.classifier.predict_onFrame(X)
+            with metrics.stage(f"predict.{self.classifier.__class__.__name__}", rows=rows):
+                preds = self.classifier.predict_onFrame(X)
 
+            # classifiers trained on raw labels have no y_steps
+            y = preds
             for i in self.steps_on_y:
                 logger.info(f"Executing inference pipeling with {i.__class__.__name__} for features")
-                y = i.inverse_transform(preds)
+                with metrics.stage(f"y.{i.__class__.__name__}", rows=rows):
+                    y = i.inverse_transform(y)
             return y
 
         except Exception as e:
             logger.info(f"Inference pipeline failed to execute")
             raise e
+
+
+# inference pipeline of current worker process, built once by _init_inference_worker
+_worker_pipeline = None
+
+
+def _init_inference_worker() -> None:
+    import sys
+    import logging
+    global _worker_pipeline
+
+    # stdout of parent may carry results, worker logs go to stderr
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.stdout:
+            handler.setStream(sys.stderr)
+    # results are persisted by parent process in original order
+    _worker_pipeline = InferencePipeline(writer=False)
+
+
+def _predict_shard(headlines: list[str]) -> tuple[list, str]:
+    """
+    scores single shard in worker process and returns labels with artifact version used
+    """
+    labels = _worker_pipeline.run_pipeline(data=headlines)
+    return labels.tolist() , _worker_pipeline.artifact_version()
+
+
+class ShardedInferencePipeline(Pipeline):
+
+    def __init__(
+            self,
+            workers: int = None,
+            shard_size: int = None,
+            max_in_flight: int = None,
+            writer: AsyncResultWriter = None,
+        ) -> None:
+        """
+        Pipeline scoring large inputs on every core, input is split into shards which are vectorized
+        and predicted by process pool workers, each worker loads artifacts once at startup
+
+        Results are returned in original order, at most max_in_flight shards are queued at once so
+        memory stays bounded for inputs of any size
+
+        Args:
+            workers, shard_size, max_in_flight : ShardedInference section of 'config/model_config.yaml' if None
+            writer : AsyncResultWriter persisting predictions, configured from ResultWriter section
+                     of 'config/database_config.yaml' if None, False disables it
+        """
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        config = read_yaml_config('config/model_config.yaml')['ShardedInference']
+        if workers is None:
+            workers = None if config['workers'] == 'None' else config['workers']
+        self.workers = workers or os.cpu_count()
+        self.shard_size = config['shard_size'] if shard_size is None else shard_size
+        if max_in_flight is None:
+            max_in_flight = None if config['max_in_flight'] == 'None' else config['max_in_flight']
+        self.max_in_flight = max_in_flight or 2 * self.workers
+
+        if writer is None:
+            writer = AsyncResultWriter.from_config(PostgreSqlDatabaseHandler())
+        self.writer = writer or None
+
+        logger.info(f"Initiating sharded inference pipeline with {self.workers} workers and shards of {self.shard_size} headlines")
+        # spawned workers do not inherit threads (writer, loggers) of parent process
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(config.get('start_method', 'spawn')),
+            initializer=_init_inference_worker,
+        )
+
+    def run_stream(self, records, batch_size: int = None, column: str = None):
+        """
+        Scores iterable of headlines (or of dicts if column is given) and yields (record, label)
+        in input order as soon as leading shards are predicted
+
+        Args:
+            records : iterable of headlines or dicts
+            batch_size : shard size, configured shard_size if None
+            column : field holding headline when records are dicts
+
+        yields : (record, label)
+        """
+        import itertools
+        from collections import deque
+
+        batch_size = batch_size or self.shard_size
+        records = iter(records)
+        in_flight = deque()
+
+        while True:
+            while len(in_flight) < self.max_in_flight:
+                shard = list(itertools.islice(records, batch_size))
+                if not shard:
+                    break
+                headlines = shard if column is None else [record[column] for record in shard]
+                in_flight.append((shard, headlines, self.executor.submit(_predict_shard, headlines)))
+
+            if not in_flight:
+                return
+
+            shard , headlines , future = in_flight.popleft()
+            labels , version = future.result()
+            if self.writer is not None:
+                self.writer.submit(headlines, labels, version)
+            yield from zip(shard, labels)
+
+    def run_pipeline(self, data : list[str]) -> np.ndarray:
+        """
+        Returns labels of every headline in input order
+        """
+        return np.asarray([label for _, label in self.run_stream(data)])
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class RescoringPipeline(Pipeline):
+
+    def __init__(
+            self,
+            table: str,
+            d_handler: DatabaseHandler = PostgreSqlDatabaseHandler,
+            chunksize: int = None,
+            workers: int = None,
+        ) -> None:
+        """
+        Resumable offline job scoring every row of database table with current artifacts and
+        appending predictions with their model version to output table
+
+        Table is read in key ordered chunks, predictions of each chunk are written together with
+        checkpoint (last key of chunk) in one transaction, so killed job restarts after last written
+        chunk without duplicates. Job is identified by table and artifact version, retraining the
+        model starts new job from first row. Writing chunk overlaps with scoring of next one.
+
+        Args:
+            table : source table holding headlines
+            chunksize, workers : Rescoring section of 'config/model_config.yaml' if None,
+                                 workers set scores chunks on ShardedInferencePipeline
+        """
+        self.config = read_yaml_config('config/model_config.yaml')['Rescoring']
+        self.table = table
+        self.key = self.config['key']
+        self.column = self.config['column']
+        self.chunksize = self.config['chunksize'] if chunksize is None else chunksize
+        if workers is None:
+            workers = None if self.config['workers'] == 'None' else self.config['workers']
+
+        logger.info(f"Initiating rescoring pipeline for table : {table} and {d_handler.__name__}")
+        self.data_handler = d_handler()
+        # predictions are written with checkpoint, never through cache or result writer
+        self.inference = InferencePipeline(d_handler, cache=False, writer=False)
+        self.scorer = self.inference
+        if workers is not None:
+            self.scorer = ShardedInferencePipeline(workers=workers or None, writer=False)
+
+    def run_pipeline(self) -> int:
+        """
+        Scores rows not covered by checkpoint of current job and returns total rows written by job
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        version = self.inference.artifact_version()
+        job = f"{self.table}:{version}"
+        checkpoint = self.data_handler.load_checkpoint(job, self.config['checkpoint_table'])
+        after , rows = (None, 0) if checkpoint is None else (checkpoint['last_key'], checkpoint['rows'])
+        if checkpoint is not None:
+            logger.info(f"Resuming rescoring job {job} after {self.key} : {after} with {rows} rows written")
+
+        chunks = self.data_handler.iter_from_database(
+            self.table,
+            chunksize=self.chunksize,
+            columns=[self.key, self.column],
+            key=self.key,
+            after=after,
+        )
+
+        pending = None
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                for chunk in chunks:
+                    labels = self.scorer.run_pipeline(data=chunk[self.column].tolist())
+                    if self.inference.artifact_version() != version:
+                        raise RuntimeError(f"Artifacts changed while rescoring table : {self.table}, rerun to start job for new model")
+
+                    frame = pd.DataFrame({
+                        'source_table': self.table,
+                        'source_key': chunk[self.key].to_numpy(),
+                        'headline': chunk[self.column].to_numpy(),
+                        'label': labels,
+                        'model_version': version,
+                        'created_at': pd.Timestamp.now(tz='UTC'),
+                    })
+                    # previous chunk must be committed first so checkpoints only move forward
+                    if pending is not None:
+                        pending.result()
+                    rows += len(frame)
+                    pending = executor.submit(
+                        self.data_handler.append_with_checkpoint,
+                        frame,
+                        self.config['output_table'],
+                        job,
+                        self.config['checkpoint_table'],
+                        frame['source_key'].iloc[-1],
+                        rows,
+                    )
+                    logger.info(f"Rescored {rows} rows of table : {self.table}")
+
+                if pending is not None:
+                    pending.result()
+
+        except Exception as e:
+            logger.info(f"Rescoring pipeline failed, rerun resumes after last checkpoint")
+            raise e
+
+        finally:
+            chunks.close()
+
+        logger.info(f"Rescoring job {job} finished with {rows} rows written to : {self.config['output_table']}")
+        return rows
+
+    def close(self) -> None:
+        if self.scorer is not self.inference:
+            self.scorer.close()
+
+
+def _save_shared_matrix(prefix: str, matrix, fmt: str) -> None:
+    """
+    saves sparse matrix as raw npy arrays (float32 data, int32 indices) in format sklearn trees use
+    internally, so workers can memory map it without any conversion copy
+    """
+    matrix = matrix.asformat(fmt).astype(np.float32)
+    matrix.sort_indices()
+    np.save(f"{prefix}.data.npy", matrix.data)
+    np.save(f"{prefix}.indices.npy", matrix.indices.astype(np.intc))
+    np.save(f"{prefix}.indptr.npy", matrix.indptr.astype(np.intc))
+    np.save(f"{prefix}.shape.npy", np.asarray(matrix.shape))
+
+
+def _load_shared_matrix(prefix: str, fmt: str):
+    from scipy.sparse import csr_matrix , csc_matrix
+
+    matrix_class = csr_matrix if fmt == 'csr' else csc_matrix
+    arrays = [np.load(f"{prefix}.{name}.npy", mmap_mode='r') for name in ['data', 'indices', 'indptr']]
+    return matrix_class(tuple(arrays), shape=tuple(np.load(f"{prefix}.shape.npy")), copy=False)
+
+
+# matrices memory mapped by current worker process, loaded on first trial only
+_shared_features = {}
+
+
+def _run_trial(features_path: str, trial: int, params: dict) -> dict:
+    """
+    fits single candidate on memory mapped features and returns its metrics, runs in worker process
+    """
+    import time
+    import pickle
+    from sklearn.metrics import accuracy_score , precision_score , recall_score , f1_score
+    from src.model import build_decision_tree
+
+    if _shared_features.get('path') != features_path:
+        _shared_features.update({
+            'path': features_path,
+            # trees fit on csc and predict on csr matrices
+            'X_train': _load_shared_matrix(os.path.join(features_path, 'X_train'), 'csc'),
+            'X_test': _load_shared_matrix(os.path.join(features_path, 'X_test'), 'csr'),
+            'y_train': np.load(os.path.join(features_path, 'y_train.npy'), mmap_mode='r'),
+            'y_test': np.load(os.path.join(features_path, 'y_test.npy'), mmap_mode='r'),
+        })
+
+    start = time.perf_counter()
+    model = build_decision_tree(params)
+    model.fit(_shared_features['X_train'], _shared_features['y_train'])
+    fit_time = time.perf_counter() - start
+
+    y_test = _shared_features['y_test']
+    y_pred = model.predict(_shared_features['X_test'])
+
+    model_path = os.path.join(features_path, 'trials', f'trial_{trial}.pkl')
+    with open(model_path, 'wb') as file:
+        pickle.dump(model, file)
+
+    return {
+        'trial': trial,
+        'params': params,
+        'model_path': model_path,
+        'metrics': {
+            'accuracy': accuracy_score(y_test, y_pred),
+            'precision': precision_score(y_test, y_pred, average='weighted'),
+            'recall': recall_score(y_test, y_pred, average='weighted'),
+            'f1_score': f1_score(y_test, y_pred, average='weighted'),
+            'fit_time_s': fit_time,
+            'node_count': model.tree_.node_count,
+        },
+    }
+
+
+class TuningPipeline(Pipeline):
+
+    def __init__(
+            self,
+            d_handler: DatabaseHandler = PostgreSqlDatabaseHandler,
+            x_steps: list[PreprocessStep] = [CountVectTransformer],
+            y_steps: list[PreprocessStep] = [LabelTransformer],
+        ) -> None:
+        """
+        Pipeline which evaluates DecisionTreeClassifier candidates from Tuning search space of
+        'config/model_config.yaml' in process pool and promotes best one to FILEPATH
+
+        Features are vectorized once and shared with workers through memory mapped files, x_steps /
+        y_steps are fitted with save=False and only saved together with promoted model, so artifacts
+        in use are untouched while tuning runs or when it fails
+        """
+        logger.info(f"Initiating tuning pipeline for model : DecisionTreeClassifier and {d_handler.__name__}")
+        model_config = read_yaml_config('config/model_config.yaml')
+        self.config = model_config['Tuning']
+        self.base_params = model_config['DecisionTreeClassifier']
+        self.filepath = model_config['FILEPATH']
+        self.data_handler = d_handler()
+        self.steps_on_x = [i(save=False) for i in x_steps]
+        self.steps_on_y = [i(save=False) for i in y_steps]
+
+    def candidates(self) -> list[dict]:
+        """
+        Returns every combination of search space values on top of DecisionTreeClassifier params,
+        random subset of max_trials combinations if max_trials is set
+        """
+        import random
+        import itertools
+
+        space = self.config['search_space']
+        names = list(space)
+        candidates = [
+            {**self.base_params, **dict(zip(names, values))}
+            for values in itertools.product(*[space[name] for name in names])
+        ]
+
+        max_trials = self.config.get('max_trials', 'None')
+        if max_trials != 'None' and max_trials < len(candidates):
+            candidates = random.Random(self.config.get('seed', 0)).sample(candidates, max_trials)
+        return candidates
+
+    def _prepare_features(self, features_path: str) -> None:
+        train = self.data_handler.load_from_database('traindata', columns=['headline', 'label'])
+        test = self.data_handler.load_from_database('testdata', columns=['headline', 'label'])
+
+        X_train , y_train = train['headline'] , train['label']
+        X_test , y_test = test['headline'] , test['label']
+        for i in self.steps_on_x:
+            logger.info(f"Executing tuning pipeline with {i.__class__.__name__} for features")
+            X_train = i.fit_transform(X_train)
+            X_test = i.transform(X_test)
+        for i in self.steps_on_y:
+            logger.info(f"Executing tuning pipeline with {i.__class__.__name__} for labels")
+            y_train = i.fit_transform(y_train)
+            y_test = i.transform(y_test)
+
+        os.makedirs(os.path.join(features_path, 'trials'), exist_ok=True)
+        _save_shared_matrix(os.path.join(features_path, 'X_train'), X_train, 'csc')
+        _save_shared_matrix(os.path.join(features_path, 'X_test'), X_test, 'csr')
+        np.save(os.path.join(features_path, 'y_train.npy'), np.asarray(y_train))
+        np.save(os.path.join(features_path, 'y_test.npy'), np.asarray(y_test))
+
+    def run_pipeline(self) -> dict:
+        import shutil
+        import mlflow
+        from concurrent.futures import ProcessPoolExecutor , as_completed
+
+        features_path = self.config['features_path']
+        metric = self.config['metric']
+        n_jobs = None if self.config['n_jobs'] == 'None' else self.config['n_jobs']
+        candidates = self.candidates()
+
+        logger.info(f"Executing tuning pipeline with {self.data_handler.__class__.__name__}")
+        self._prepare_features(features_path)
+
+        best = None
+        try:
+            with mlflow.start_run(run_name='tuning'):
+                mlflow.log_params({'trials': len(candidates), 'metric': metric})
+
+                with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+                    futures = [
+                        executor.submit(_run_trial, features_path, trial, params)
+                        for trial, params in enumerate(candidates)
+                    ]
+                    for future in as_completed(futures):
+                        result = future.result()
+                        logger.info(f"Tuning trial {result['trial']} finished with {metric} : {result['metrics'][metric]}")
+
+                        with mlflow.start_run(run_name=f"trial-{result['trial']}", nested=True):
+                            mlflow.log_params(result['params'])
+                            mlflow.log_metrics(result['metrics'])
+
+                        if best is None or result['metrics'][metric] > best['metrics'][metric]:
+                            best = result
+
+                mlflow.log_params({f"best_{name}": value for name, value in best['params'].items()})
+                mlflow.log_metrics({f"best_{name}": value for name, value in best['metrics'].items()})
+
+        except Exception as e:
+            logger.info(f"Failed tuning with MLFlow tracking")
+            raise e
+
+        logger.info(f"Promoting trial {best['trial']} with {metric} : {best['metrics'][metric]} to : {self.filepath}")
+        tmp_path = f"{self.filepath}.tmp"
+        shutil.copyfile(best['model_path'], tmp_path)
+        # vectorizer / encoder fitted for trials are saved in same step as model they belong to
+        for i in [*self.steps_on_x, *self.steps_on_y]:
+            i.save_artifact()
+        os.replace(tmp_path, self.filepath)
+        registry.invalidate(self.filepath)
+        shutil.rmtree(features_path, ignore_errors=True)
+        _export_bundle(self.steps_on_x, self.steps_on_y, DecisionTreeClassifier())
+
+        return best
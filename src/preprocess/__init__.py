@@ -1,15 +1,12 @@
 from abc import ABC , abstractmethod
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.preprocessing import LabelEncoder
-import nltk
 import pickle
 import os
 from pathlib import Path
-from nltk.tokenize import word_tokenize , sent_tokenize
-from nltk.corpus import stopwords
 from typing import Literal
 from src import logger
 from src.utils import read_yaml_config
+from src.utils.artifacts import registry
+from src.utils.bundle import load_bundle
 
 class PreprocessStep(ABC):
     """
@@ -60,13 +57,49 @@ class CountVectTransformer(PreprocessStep):
         
         self.vectorizer = None
         self.save = save
+        # fitted with save=False and not saved yet, used instead of pickle file
+        self.unsaved = False
         self.load_path = 'artifacts/CountVectTransformer/latest.pkl'
         self.config = read_yaml_config('config/preprocess_config.yaml')['CountVectTransformer']
 
+    def _load(self):
+        """
+        returns fitted vectorizer from pickle file (unsaved fit of this step if any), artifact bundle
+        is only read by BundleVectTransformer
+        """
+        if self.unsaved:
+            return self.vectorizer
+        return registry.get(self.load_path)
+
+    def save_artifact(self) -> None:
+        """
+        writes fitted vectorizer to load_path, file is replaced atomically so readers never load partial pickle
+        """
+        logger.info(f"Saving Vectorizer to : {self.load_path}")
+        os.makedirs(os.path.dirname(self.load_path), exist_ok=True)
+        tmp_path = f"{self.load_path}.tmp{os.getpid()}"
+        with open(tmp_path,'wb') as f:
+            pickle.dump(self.vectorizer,f)
+        os.replace(tmp_path, self.load_path)
+        registry.put(self.load_path, self.vectorizer)
+        self.unsaved = False
+
+    def _tokenizer(self):
+        """
+        returns tokenizer configured for vectorizer, None for sklearn default token_pattern
+        """
+        if self.config['tokenizer'] == 'None':
+            return None
+        if self.config['tokenizer'] == 'HeadlineTokenizer':
+            return HeadlineTokenizer.from_config()
+        raise ValueError(f"Unknown tokenizer : {self.config['tokenizer']}, expected None | HeadlineTokenizer")
+
     def fit_transform(self, data:list ) -> list:
         """
         trains a count vectorizer on given data and return transformed data 
         """
+        from sklearn.feature_extraction.text import CountVectorizer
+
         try:
             self.vectorizer = CountVectorizer(
                 input = self.config['input'],
@@ -75,9 +108,10 @@ class CountVectTransformer(PreprocessStep):
                 strip_accents = None if self.config['strip_accents'] == 'None' else self.config['strip_accents'],
                 lowercase = self.config['lowercase'],
                 preprocessor = None if self.config['preprocessor'] == 'None' else self.config['preprocessor'],
-                tokenizer = None if self.config['tokenizer'] == 'None' else self.config['tokenizer'],
+                tokenizer = self._tokenizer(),
                 stop_words = self.config['stop_words'],
-                token_pattern = None if self.config['token_pattern'] == 'None' else self.config['token_pattern'],
+                # pattern is only used by default tokenizer
+                token_pattern = None if self.config['token_pattern'] == 'None' or self.config['tokenizer'] != 'None' else self.config['token_pattern'],
                 analyzer = self.config['analyzer'],
                 max_df = self.config['max_df'],
                 min_df = self.config['min_df'],
@@ -87,13 +121,9 @@ class CountVectTransformer(PreprocessStep):
             )
             data = self.vectorizer.fit_transform(data)
 
+            self.unsaved = True
             if self.save:
-                logger.info(f"Saving Vectorizer to : {self.load_path}")
-                if not os.path.exists(self.load_path):
-                    path = self.load_path.split('/')[:-1]
-                    os.makedirs('/'.join(path),exist_ok=True)
-                with open(self.load_path,'wb') as f:
-                    pickle.dump(self.vectorizer,f)
+                self.save_artifact()
                 
         except Exception as e:
             raise e
@@ -111,9 +141,7 @@ class CountVectTransformer(PreprocessStep):
         output: list
         """
         try:
-            logger.info(f"Reading vectorizer binary from : {self.load_path}")
-            with open(self.load_path,'rb') as f:
-                self.vectorizer = pickle.load(f)
+            self.vectorizer = self._load()
 
             data = self.vectorizer.transform(data)
         
@@ -133,9 +161,7 @@ class CountVectTransformer(PreprocessStep):
         output: list
         """
         try:
-            logger.info(f"Reading vectorizer binary from : {self.load_path}")
-            with open(self.load_path,'rb') as f:
-                self.vectorizer = pickle.load(f)
+            self.vectorizer = self._load()
 
             data = self.vectorizer.inverse_transform(data)
         
@@ -145,6 +171,98 @@ class CountVectTransformer(PreprocessStep):
         return data
 
 
+class HashingVectTransformer(PreprocessStep):
+    def __init__(self) -> None:
+        """
+        PreprocessStep Implemented to include HashingVectorizer into preproccesing steps for NLP data
+
+        Vectorizer is stateless so there is no vocabulary to fit or save, memory footprint is fixed
+        by n_features and shards of data can be transformed by parallel workers
+        """
+
+        super().__init__()
+
+        self.config = read_yaml_config('config/preprocess_config.yaml')['HashingVectTransformer']
+        self.n_jobs = self.config['n_jobs']
+        self.shard_size = self.config['shard_size']
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.vectorizer = HashingVectorizer(
+            n_features = self.config['n_features'],
+            input = self.config['input'],
+            encoding = self.config['encoding'],
+            decode_error = self.config['decode_error'],
+            strip_accents = None if self.config['strip_accents'] == 'None' else self.config['strip_accents'],
+            lowercase = self.config['lowercase'],
+            stop_words = None if self.config['stop_words'] == 'None' else self.config['stop_words'],
+            token_pattern = None if self.config['token_pattern'] == 'None' else self.config['token_pattern'],
+            analyzer = self.config['analyzer'],
+            binary = self.config['binary'],
+            norm = None if self.config['norm'] == 'None' else self.config['norm'],
+            alternate_sign = self.config['alternate_sign'],
+        )
+
+    def fit_transform(self, data:list) -> list:
+        """
+        Returns transformed sequences of given data, nothing is fitted as hashing vectorizer is stateless
+        """
+        return self.transform(data)
+
+    def transform(self,data:list) -> list:
+        """
+        Returns transformed sequences of given data, shards are transformed in parallel if n_jobs != 1
+
+        Args:
+            data : list of sentences
+
+        output: sparse matrix
+        """
+        try:
+            if self.n_jobs == 1 or len(data) <= self.shard_size:
+                return self.vectorizer.transform(data)
+
+            from joblib import Parallel , delayed
+            from scipy.sparse import vstack
+
+            data = list(data)
+            shards = [data[i:i + self.shard_size] for i in range(0, len(data), self.shard_size)]
+            logger.info(f"Transforming {len(shards)} shards with {self.n_jobs} workers")
+
+            results = Parallel(n_jobs=self.n_jobs)(
+                delayed(self.vectorizer.transform)(shard) for shard in shards
+            )
+            data = vstack(results, format='csr')
+
+        except Exception as e:
+            raise e
+
+        return data
+
+    def inverse_transform(self, data: list) -> list:
+        raise NotImplementedError
+
+
+# vectorizers selectable with VECTORIZER key of 'config/model_config.yaml'
+VECTORIZERS = {
+    'CountVectTransformer': CountVectTransformer,
+    'HashingVectTransformer': HashingVectTransformer,
+}
+
+
+def vectorizer_from_config(default: str = 'CountVectTransformer') -> type:
+    """
+    returns PreprocessStep class selected by VECTORIZER key of 'config/model_config.yaml'
+
+    Args:
+        default : vectorizer name used when VECTORIZER is None (vectorizer classifier was built for)
+    """
+    name = read_yaml_config('config/model_config.yaml').get('VECTORIZER', 'None')
+    name = default if name in (None, 'None') else name
+    if name not in VECTORIZERS:
+        raise ValueError(f"Unknown VECTORIZER : {name}, expected one of {list(VECTORIZERS)}")
+    return VECTORIZERS[name]
+
+
 class LabelTransformer(PreprocessStep):
     def __init__(self,save : bool = True) -> None:
         """
@@ -155,23 +273,45 @@ class LabelTransformer(PreprocessStep):
         
         self.encoder = None
         self.save = save
+        # fitted with save=False and not saved yet, used instead of pickle file
+        self.unsaved = False
         self.load_path = f'artifacts/LabelTransformer/latest.pkl'
 
+    def _load(self):
+        """
+        returns fitted encoder from pickle file (unsaved fit of this step if any), artifact bundle
+        is only read by BundleLabelTransformer
+        """
+        if self.unsaved:
+            return self.encoder
+        return registry.get(self.load_path)
+
+    def save_artifact(self) -> None:
+        """
+        writes fitted encoder to load_path, file is replaced atomically so readers never load partial pickle
+        """
+        logger.info(f"Saving Encoder to : {self.load_path}")
+        os.makedirs(os.path.dirname(self.load_path), exist_ok=True)
+        tmp_path = f"{self.load_path}.tmp{os.getpid()}"
+        with open(tmp_path,'wb') as f:
+            pickle.dump(self.encoder,f)
+        os.replace(tmp_path, self.load_path)
+        registry.put(self.load_path, self.encoder)
+        self.unsaved = False
+
     def fit_transform(self, data:list ) -> list:
         """
         trains a count vectorizer on given data and return transformed data 
         """
+        from sklearn.preprocessing import LabelEncoder
+
         try:
             self.encoder = LabelEncoder()
             data = self.encoder.fit_transform(data)
 
+            self.unsaved = True
             if self.save:
-                logger.info(f"Saving Encoder to : {self.load_path}")
-                if not os.path.exists(self.load_path):
-                    path = self.load_path.split('/')[:-1]
-                    os.makedirs('/'.join(path),exist_ok=True)
-                with open(self.load_path,'wb') as f:
-                    pickle.dump(self.encoder,f)
+                self.save_artifact()
 
 
         except Exception as e:
@@ -191,9 +331,7 @@ class LabelTransformer(PreprocessStep):
         """
         try:
 
-            logger.info(f"Reading encoder binary from : {self.load_path}")
-            with open(self.load_path,'rb') as f:
-                self.encoder = pickle.load(f)
+            self.encoder = self._load()
 
             data = self.encoder.transform(data)
         except Exception as e:
@@ -212,9 +350,7 @@ class LabelTransformer(PreprocessStep):
         """
         try:
 
-            logger.info(f"Reading encoder binary from : {self.load_path}")
-            with open(self.load_path,'rb') as f:
-                self.encoder = pickle.load(f)
+            self.encoder = self._load()
 
             data = self.encoder.inverse_transform(data)
         except Exception as e:
@@ -223,39 +359,240 @@ class LabelTransformer(PreprocessStep):
         return data
 
 
+class BundleVectTransformer(PreprocessStep):
+    def __init__(self) -> None:
+        """
+        PreprocessStep vectorizing headlines with NumPy replica of CountVectorizer from artifact
+        bundle (BUNDLE_PATH of 'config/model_config.yaml'), sklearn is never imported
+
+        Vectorizer is fitted by CountVectTransformer and exported with `python main.py export`
+        """
+        super().__init__()
+        self.load_path = None
+        self.bundle_path = read_yaml_config('config/model_config.yaml')['BUNDLE_PATH']
+        self.config = read_yaml_config('config/preprocess_config.yaml')['CountVectTransformer']
+
+    def fit_transform(self, data:list) -> list:
+        raise NotImplementedError("BundleVectTransformer is inference only, fit CountVectTransformer and export bundle")
+
+    def transform(self, data:list) -> list:
+        """
+        Returns term counts of given data as CSR matrix
+
+        Args:
+            data : list of sentences
+
+        output: CSRBatch
+        """
+        return load_bundle(self.bundle_path)['engine_vectorizer'].transform(data)
+
+    def inverse_transform(self, data: list) -> list:
+        raise NotImplementedError
+
+
+class BundleLabelTransformer(PreprocessStep):
+    def __init__(self) -> None:
+        """
+        PreprocessStep encoding labels with classes array of artifact bundle, sklearn is never imported
+        """
+        super().__init__()
+        self.load_path = None
+        self.bundle_path = read_yaml_config('config/model_config.yaml')['BUNDLE_PATH']
+
+    def _classes(self):
+        return load_bundle(self.bundle_path)['arrays']['classes']
+
+    def fit_transform(self, data:list) -> list:
+        raise NotImplementedError("BundleLabelTransformer is inference only, fit LabelTransformer and export bundle")
+
+    def transform(self, data:list) -> list:
+        """
+        Returns encoded labels, raises ValueError for labels not seen in training
+        """
+        import numpy as np
+
+        classes = self._classes()
+        data = np.asarray(data)
+        encoded = np.minimum(np.searchsorted(classes, data), len(classes) - 1)
+        if not np.all(classes[encoded] == data):
+            raise ValueError(f"y contains previously unseen labels : {np.setdiff1d(data, classes).tolist()}")
+        return encoded
+
+    def inverse_transform(self, data:list) -> list:
+        """
+        Returns labels of encoded predictions
+        """
+        import numpy as np
+        return np.asarray(self._classes()).take(np.asarray(data, dtype=np.intp))
+
+
+# nltk data directories already added to nltk search path and checked by this process
+_nltk_ready = set()
+
+
+def _load_nltk_tokenizers(nltk_data: str, language: str):
+    """
+    returns nltk (word_tokenize, sent_tokenize) using punkt data from local directory only, nothing
+    is downloaded at runtime
+
+    raises LookupError with download hint if punkt data is missing
+    """
+    import nltk
+    from nltk.tokenize import word_tokenize , sent_tokenize
+
+    if nltk_data not in _nltk_ready:
+        if nltk_data not in nltk.data.path:
+            nltk.data.path.insert(0, nltk_data)
+        try:
+            nltk.data.find(f'tokenizers/punkt_tab/{language}/')
+        except LookupError:
+            raise LookupError(
+                f"NLTK punkt_tab data for '{language}' not found in : {nltk.data.path}, "
+                f"install it once with `python -m nltk.downloader -d {nltk_data} punkt_tab`"
+            ) from None
+        _nltk_ready.add(nltk_data)
+
+    return word_tokenize , sent_tokenize
+
+
+class HeadlineTokenizer:
+    """
+    Picklable tokenizer of single text, can be used as tokenizer of CountVectTransformer (set
+    `tokenizer: HeadlineTokenizer` in 'config/preprocess_config.yaml') and by process pool workers
+
+    regex mode splits text with compiled pattern, nltk mode uses punkt tokenizers loaded from local
+    nltk_data directory
+    """
+
+    def __init__(
+            self,
+            level: Literal['word','sentence'] = 'word',
+            mode: Literal['regex','nltk'] = 'regex',
+            token_pattern: str = r"(?u)\b\w\w+\b",
+            nltk_data: str = 'nltk_data/',
+            language: str = 'english',
+        ) -> None:
+        self.level = level
+        self.mode = mode
+        self.token_pattern = token_pattern
+        self.nltk_data = nltk_data
+        self.language = language
+        self._tokenize = None
+
+    @classmethod
+    def from_config(cls, level: str = 'word', config: dict = None):
+        """
+        returns tokenizer configured by TokenTransformer section of 'config/preprocess_config.yaml'
+        """
+        if config is None:
+            config = read_yaml_config('config/preprocess_config.yaml')['TokenTransformer']
+        return cls(
+            level = level,
+            mode = config['mode'],
+            token_pattern = config['token_pattern'],
+            nltk_data = config['nltk_data'],
+            language = config['language'],
+        )
+
+    def get_config(self) -> dict:
+        return {
+            'level': self.level,
+            'mode': self.mode,
+            'token_pattern': self.token_pattern,
+            'nltk_data': self.nltk_data,
+            'language': self.language,
+        }
+
+    def _build(self):
+        if self.mode == 'regex':
+            import re
+            if self.level == 'word':
+                return re.compile(self.token_pattern).findall
+            splitter = re.compile(r'(?<=[.!?])\s+')
+            return lambda text: [sentence for sentence in splitter.split(text.strip()) if sentence]
+
+        if self.mode == 'nltk':
+            word_tokenize , sent_tokenize = _load_nltk_tokenizers(self.nltk_data, self.language)
+            if self.level == 'word':
+                return lambda text: word_tokenize(text, language=self.language)
+            return lambda text: sent_tokenize(text, language=self.language)
+
+        raise ValueError(f"Unknown tokenizer mode : {self.mode}, expected regex | nltk")
+
+    def __call__(self, text: str) -> list[str]:
+        if self._tokenize is None:
+            self._tokenize = self._build()
+        return self._tokenize(text)
+
+    def tokenize_batch(self, texts: list[str]) -> list[list[str]]:
+        if self._tokenize is None:
+            self._tokenize = self._build()
+        tokenize = self._tokenize
+        return [tokenize(text) for text in texts]
+
+    def __getstate__(self) -> dict:
+        # compiled tokenizer is rebuilt lazily after unpickling
+        return self.get_config()
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def __repr__(self) -> str:
+        return f"HeadlineTokenizer(level={self.level!r}, mode={self.mode!r})"
+
+
 class TokenTransformer(PreprocessStep):
-    def __init__(self,level:Literal['word','sentence']) -> None:
+    def __init__(self,level:Literal['word','sentence'] = 'word') -> None:
         """
-        Preprocess step implementation for tokenizing data into token
+        Preprocess step implementation for tokenizing data into token, each record is tokenized
+        separately in batches which are spread over process pool if n_jobs != 1
+
+        Tokenizer mode (regex | nltk) and local nltk data directory are configured in
+        TokenTransformer section of 'config/preprocess_config.yaml'
+
         Args: 
             level str : word | sentence
         """
         super().__init__()
-        nltk.download('punkt_tab')
-        if level == 'word':
-            self.tokenizer = word_tokenize
-        elif level == 'sentence':
-            self.tokenizer = sent_tokenize
+        self.config = read_yaml_config('config/preprocess_config.yaml')['TokenTransformer']
+        self.batch_size = self.config['batch_size']
+        self.n_jobs = self.config['n_jobs']
+        self.tokenizer = HeadlineTokenizer.from_config(level, self.config)
 
     def fit_transform(self,data:list) -> list:
         """
+        Returns tokens of every record, tokenizer has nothing to fit
         """
-        try:
-            data = self.tokenizer(data)
-        except Exception as e:
-            raise e
-        
-        return data
+        return self.transform(data)
 
     def transform(self,data:list) -> list:
         """
+        Returns list of tokens of every record
+
+        Args:
+            data : list of sentences
+
+        output: list[list[str]]
         """
         try:
-            data = self.tokenizer(data)
+            data = list(data)
+            batches = [data[i:i + self.batch_size] for i in range(0, len(data), self.batch_size)]
+
+            if self.n_jobs == 1 or len(batches) <= 1:
+                return [tokens for batch in batches for tokens in self.tokenizer.tokenize_batch(batch)]
+
+            from joblib import Parallel , delayed
+
+            logger.info(f"Tokenizing {len(batches)} batches with {self.n_jobs} workers")
+            results = Parallel(n_jobs=self.n_jobs)(
+                delayed(self.tokenizer.tokenize_batch)(batch) for batch in batches
+            )
+            data = [tokens for batch in results for tokens in batch]
+
         except Exception as e:
             raise e
         
         return data
     
     def inverse_transform(self, data: list) -> list:
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
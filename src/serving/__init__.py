@@ -0,0 +1,275 @@
+import os
+import json
+import time
+import queue
+import threading
+import socketserver
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from src import logger
+from src.utils import read_yaml_config
+from src.utils.instrumentation import stage_registry
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single headline requests into batched prediction calls
+
+    Requests are queued and a single worker thread collects them until either max_batch_size
+    headlines are waiting or the oldest request has waited max_wait_ms, then scores the whole
+    batch with one call to predict_fn.
+    """
+
+    _STOP = object()
+
+    def __init__(self, predict_fn: Callable[[list], list], max_batch_size: int = 256, max_wait_ms: float = 2) -> None:
+        """
+        Args:
+            predict_fn : function scoring list of headlines and returning list of labels
+            max_batch_size : maximum number of headlines in single batch
+            max_wait_ms : maximum time in milliseconds to wait for batch to fill
+        """
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='MicroBatcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, headline: str) -> Future:
+        """
+        Queues single headline and returns future resolving to its predicted label
+        """
+        future = Future()
+        self._queue.put((headline, future))
+        return future
+
+    def predict(self, headlines: list[str], timeout: float = None) -> list:
+        """
+        Queues headlines individually and waits for their labels
+        """
+        futures = [self.submit(headline) for headline in headlines]
+        return [future.result(timeout) for future in futures]
+
+    def close(self) -> None:
+        """
+        Stops worker thread after already queued requests are scored
+        """
+        self._queue.put(self._STOP)
+        self._worker.join()
+
+    def _collect(self, first) -> tuple[list, bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return batch, True
+            batch.append(item)
+
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            batch, stop = self._collect(item)
+
+            try:
+                labels = self.predict_fn([headline for headline, _ in batch])
+                for (_, future), label in zip(batch, labels):
+                    future.set_result(label)
+            except Exception as e:
+                logger.error(f"Batched prediction failed for {len(batch)} headlines with {e}")
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    self._predict_each(batch)
+
+    def _predict_each(self, batch: list) -> None:
+        # retry one by one so only requests which fail on their own get the exception
+        for headline, future in batch:
+            try:
+                future.set_result(self.predict_fn([headline])[0])
+            except Exception as e:
+                future.set_exception(e)
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP endpoint of inference server
+
+    POST /predict  {"headline": str} -> {"label": label}
+                   {"headlines": [str]} -> {"labels": [label]}
+    GET  /health   -> {"status": "ok"}
+    GET  /metrics  -> stage timings and prediction cache stats in prometheus text format
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send_json(self, status: int, body: dict) -> None:
+        content = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_text(self, status: int, body: str) -> None:
+        content = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self) -> None:
+        if self.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+        elif self.path == '/metrics':
+            self._send_text(200, self.server.metrics())
+        else:
+            self._send_json(404, {'error': f'unknown path : {self.path}'})
+
+    def do_POST(self) -> None:
+        if self.path != '/predict':
+            self._send_json(404, {'error': f'unknown path : {self.path}'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send_json(400, {'error': f'invalid request body : {e}'})
+            return
+
+        if not isinstance(body, dict):
+            self._send_json(400, {'error': 'request body must be json object'})
+            return
+        if 'headline' in body and not isinstance(body['headline'], str):
+            self._send_json(400, {'error': "'headline' must be string"})
+            return
+        if 'headline' not in body and 'headlines' in body and (
+            not isinstance(body['headlines'], list) or not all(isinstance(i, str) for i in body['headlines'])
+        ):
+            self._send_json(400, {'error': "'headlines' must be list of strings"})
+            return
+
+        try:
+            if 'headline' in body:
+                label = self.server.batcher.submit(body['headline']).result()
+                self._send_json(200, {'label': label})
+            elif 'headlines' in body:
+                labels = self.server.batcher.predict(body['headlines'])
+                self._send_json(200, {'labels': labels})
+            else:
+                self._send_json(400, {'error': "request body needs 'headline' or 'headlines'"})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def address_string(self) -> str:
+        # unix socket connections have no client address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class ThreadingInferenceHTTPServer(ThreadingHTTPServer):
+    # default listen backlog of 5 resets connections under concurrent load
+    request_queue_size = 1024
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class InferenceServer:
+    """
+    Long lived inference server keeping preprocess artifacts and classifier warm in memory
+    """
+
+    def __init__(self, pipeline=None, config: dict = None) -> None:
+        """
+        Args:
+            pipeline : InferencePipeline instance, new one is created if None
+            config : InferenceServer section of 'config/serve_config.yaml' if None
+        """
+        if config is None:
+            config = read_yaml_config('config/serve_config.yaml')['InferenceServer']
+        if pipeline is None:
+            from src.pipelines import InferencePipeline
+            pipeline = InferencePipeline()
+
+        self.config = config
+        self.pipeline = pipeline
+        self.batcher = MicroBatcher(
+            predict_fn=self.predict_batch,
+            max_batch_size=config['max_batch_size'],
+            max_wait_ms=config['max_wait_ms'],
+        )
+        self.httpd = None
+
+    def predict_batch(self, headlines: list[str]) -> list:
+        """
+        Scores batch of headlines with inference pipeline and returns json serializable labels
+        """
+        labels = self.pipeline.run_pipeline(data=headlines)
+        return labels.tolist() if hasattr(labels, 'tolist') else list(labels)
+
+    def metrics(self) -> str:
+        """
+        Returns stage timings of every inference run, prediction cache and result writer stats in prometheus text format
+        """
+        text = stage_registry.render()
+        cache = getattr(self.pipeline, 'cache', None)
+        if cache is not None:
+            for name, value in cache.stats().items():
+                text += f"# TYPE sentistock_prediction_cache_{name} gauge\n"
+                text += f"sentistock_prediction_cache_{name} {value}\n"
+        writer = getattr(self.pipeline, 'writer', None)
+        if writer is not None:
+            for name, value in writer.stats().items():
+                text += f"# TYPE sentistock_result_writer_{name} gauge\n"
+                text += f"sentistock_result_writer_{name} {value}\n"
+        return text
+
+    def serve_forever(self) -> None:
+        """
+        Binds http server on configured unix socket or host / port and serves until interrupted
+        """
+        socket_path = None if self.config.get('socket', 'None') == 'None' else self.config['socket']
+
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.httpd = ThreadingUnixHTTPServer(socket_path, InferenceRequestHandler)
+            logger.info(f"Inference server listening on unix socket : {socket_path}")
+        else:
+            self.httpd = ThreadingInferenceHTTPServer((self.config['host'], self.config['port']), InferenceRequestHandler)
+            logger.info(f"Inference server listening on : http://{self.config['host']}:{self.config['port']}")
+
+        self.httpd.batcher = self.batcher
+        self.httpd.metrics = self.metrics
+
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Inference server interrupted, shutting down")
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        if self.httpd is not None:
+            self.httpd.server_close()
+            self.httpd = None
+        self.batcher.close()
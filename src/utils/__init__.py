@@ -1,6 +1,27 @@
+import re
 import yaml
+import hashlib
+import unicodedata
 
 def read_yaml_config(filepath:str) -> dict:
     with open(filepath,'r+') as file:
         content = yaml.safe_load(file)
-    return content
\ No newline at end of file
+    return content
+
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_headline(headline: str) -> str:
+    """
+    returns headline in canonical form (unicode NFKC, lowercase, collapsed whitespace) so
+    trivially different copies of same headline compare equal
+    """
+    headline = unicodedata.normalize('NFKC', headline)
+    return _WHITESPACE.sub(' ', headline).strip().lower()
+
+
+def headline_fingerprint(headline: str) -> str:
+    """
+    returns stable hash of normalized headline
+    """
+    return hashlib.sha1(normalize_headline(headline).encode('utf-8')).hexdigest()
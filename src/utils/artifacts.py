@@ -0,0 +1,108 @@
+import os
+import pickle
+import hashlib
+import threading
+from typing import Any, Callable
+from src import logger
+
+
+class ArtifactRegistry:
+    """
+    Process wide registry for fitted artifacts (vectorizers, encoders, models)
+
+    Each artifact file is deserialized once and the same object is shared by every pipeline
+    and thread of the process. A file is only read again when its mtime / size changes and
+    it is only deserialized again when its content hash changes as well.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._path_locks = {}
+        self._entries = {}
+        self._digests = {}
+
+    def _path_lock(self, path: str) -> threading.Lock:
+        with self._lock:
+            return self._path_locks.setdefault(path, threading.Lock())
+
+    @staticmethod
+    def _stat_key(path: str) -> tuple:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, path: str, loader: Callable[[bytes], Any] = pickle.loads) -> Any:
+        """
+        Returns artifact stored at given path, loading it only if file has changed since last call
+
+        Args:
+            path : filepath of artifact
+            loader : function converting raw file content into object (pickle.loads)
+
+        output : deserialized artifact
+        """
+        path = os.path.abspath(path)
+        stat_key = self._stat_key(path)
+
+        entry = self._entries.get(path)
+        if entry is not None and entry['stat'] == stat_key:
+            return entry['object']
+
+        with self._path_lock(path):
+            entry = self._entries.get(path)
+            if entry is not None and entry['stat'] == stat_key:
+                return entry['object']
+
+            with open(path, 'rb') as file:
+                content = file.read()
+            digest = hashlib.sha256(content).hexdigest()
+
+            if entry is not None and entry['digest'] == digest:
+                # file was touched but content is same, keep already loaded object
+                self._entries[path] = {**entry, 'stat': stat_key}
+                return entry['object']
+
+            logger.info(f"Loading artifact from : {path}")
+            obj = loader(content)
+            self._entries[path] = {'stat': stat_key, 'digest': digest, 'object': obj}
+            return obj
+
+    def put(self, path: str, obj: Any) -> None:
+        """
+        Registers object which was just saved to given path so next get() does not reload it
+        """
+        path = os.path.abspath(path)
+        with self._path_lock(path):
+            stat_key = self._stat_key(path)
+            with open(path, 'rb') as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            self._entries[path] = {'stat': stat_key, 'digest': digest, 'object': obj}
+
+    def version(self, path: str) -> str:
+        """
+        Returns content hash of artifact stored at given path without deserializing it
+        """
+        path = os.path.abspath(path)
+        stat_key = self._stat_key(path)
+        entry = self._entries.get(path) or self._digests.get(path)
+        if entry is not None and entry['stat'] == stat_key:
+            return entry['digest']
+
+        with open(path, 'rb') as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+        self._digests[path] = {'stat': stat_key, 'digest': digest}
+        return digest
+
+    def invalidate(self, path: str = None) -> None:
+        """
+        Drops given artifact (or every artifact if path is None) from registry
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._digests.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+                self._digests.pop(os.path.abspath(path), None)
+
+
+registry = ArtifactRegistry()
@@ -0,0 +1,262 @@
+import os
+import json
+import shutil
+import datetime
+import numpy as np
+from src import logger
+from src.utils import read_yaml_config
+from src.utils.artifacts import registry
+
+BUNDLE_VERSION = 1
+MANIFEST = 'manifest.json'
+NODE_FIELDS = [
+    'left_child', 'right_child', 'feature', 'threshold', 'impurity',
+    'n_node_samples', 'weighted_n_node_samples', 'missing_go_to_left',
+]
+
+
+def bundle_path_from_config() -> str:
+    """
+    Returns directory of artifact bundle if 'ARTIFACT_FORMAT' in 'config/model_config.yaml' is bundle, else None
+    """
+    config = read_yaml_config('config/model_config.yaml')
+    if config.get('ARTIFACT_FORMAT', 'pickle') != 'bundle':
+        return None
+    return config['BUNDLE_PATH']
+
+
+def _save_array(directory: str, version: str, name: str, array: np.ndarray) -> str:
+    # arrays of every export go to new version directory, files listed by current manifest never change
+    np.save(os.path.join(directory, version, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+    return f'{version}/{name}.npy'
+
+
+def _remove_old_versions(directory: str, keep: list[str]) -> None:
+    # previous version is kept for readers which loaded old manifest but did not map its arrays yet
+    for name in os.listdir(directory):
+        if name.startswith('v-') and name not in keep and os.path.isdir(os.path.join(directory, name)):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _json_params(params: dict) -> dict:
+    encoded = {}
+    for key, value in params.items():
+        if hasattr(value, 'get_config') and value.__class__.__name__ == 'HeadlineTokenizer':
+            encoded[key] = {'HeadlineTokenizer': value.get_config()}
+            continue
+        if callable(value) and not isinstance(value, type):
+            raise ValueError(f"Parameter '{key}' is callable and cannot be stored in artifact bundle")
+        if isinstance(value, type):
+            value = np.dtype(value).name
+        elif isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        encoded[key] = value
+    return encoded
+
+
+def export_bundle(directory: str, vectorizer, encoder, model) -> dict:
+    """
+    Stores fitted CountVectorizer, LabelEncoder and DecisionTreeClassifier as flat .npy buffers
+    and small json manifest which can be memory mapped by any number of processes
+
+    Every export writes its arrays to new version directory and then replaces manifest, so
+    readers see either old or new bundle as whole
+
+    Args:
+        directory : output directory of bundle
+        vectorizer : fitted sklearn CountVectorizer
+        encoder : fitted sklearn LabelEncoder
+        model : fitted sklearn DecisionTreeClassifier
+
+    output : manifest dict
+    """
+    if not hasattr(model, 'tree_'):
+        raise ValueError(f"Only tree models can be exported to artifact bundle, got : {model.__class__.__name__}")
+    if len(vectorizer.vocabulary_) != model.n_features_in_:
+        raise ValueError(
+            f"Vectorizer with {len(vectorizer.vocabulary_)} terms does not match model trained on "
+            f"{model.n_features_in_} features, export artifacts of same training run"
+        )
+    if len(encoder.classes_) != len(np.atleast_1d(model.classes_)):
+        raise ValueError(
+            f"Encoder with {len(encoder.classes_)} classes does not match model with {len(np.atleast_1d(model.classes_))} classes"
+        )
+
+    version = f"v-{datetime.datetime.now():%Y%m%d%H%M%S%f}-{os.getpid()}"
+    os.makedirs(os.path.join(directory, version))
+    logger.info(f"Exporting artifact bundle to : {os.path.join(directory, version)}")
+
+    # vocabulary as fixed width unicode array ordered by column index
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    files = {'vocabulary': _save_array(directory, version, 'vocabulary', np.array(terms, dtype=str))}
+    classes = np.asarray(encoder.classes_)
+    files['classes'] = _save_array(directory, version, 'classes', classes.astype(str) if classes.dtype == object else classes)
+
+    state = model.tree_.__getstate__()
+    nodes = state['nodes']
+    for field in NODE_FIELDS:
+        if field in nodes.dtype.names:
+            files[field] = _save_array(directory, version, field, nodes[field])
+    files['value'] = _save_array(directory, version, 'value', state['values'])
+
+    manifest = {
+        'version': BUNDLE_VERSION,
+        'created': datetime.datetime.now().isoformat(),
+        'files': files,
+        'vectorizer': {
+            'class': vectorizer.__class__.__name__,
+            'params': _json_params(vectorizer.get_params()),
+            'stop_words': sorted(vectorizer.get_stop_words() or []),
+        },
+        'encoder': {'class': encoder.__class__.__name__},
+        'model': {
+            'class': model.__class__.__name__,
+            'params': _json_params(model.get_params()),
+            'n_features_in': int(model.n_features_in_),
+            'n_outputs': int(model.n_outputs_),
+            'n_classes': np.atleast_1d(model.n_classes_).astype(int).tolist(),
+            'classes': np.asarray(model.classes_).tolist(),
+            'max_features': int(model.max_features_),
+            'max_depth': int(state['max_depth']),
+            'node_count': int(state['node_count']),
+        },
+    }
+
+    previous = None
+    if os.path.exists(os.path.join(directory, MANIFEST)):
+        with open(os.path.join(directory, MANIFEST)) as file:
+            previous = os.path.dirname(next(iter(json.load(file)['files'].values()))) or None
+
+    # manifest is switched last so readers never see manifest of partially written bundle
+    tmp_path = os.path.join(directory, f'.{MANIFEST}.{os.getpid()}')
+    with open(tmp_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp_path, os.path.join(directory, MANIFEST))
+    _remove_old_versions(directory, keep=[version, previous])
+
+    return manifest
+
+
+def export_bundle_from_config(vectorizer, encoder, model) -> dict:
+    """
+    Re-exports artifact bundle to BUNDLE_PATH if 'ARTIFACT_FORMAT' is bundle, so NumPy engine serves
+    artifacts which were just trained, returns manifest or None if bundle is not configured
+    """
+    directory = bundle_path_from_config()
+    if directory is None:
+        return None
+    return export_bundle(directory, vectorizer, encoder, model)
+
+
+def load_arrays(directory: str, manifest: dict) -> dict:
+    """
+    Returns dict of read only memory mapped arrays listed in manifest
+    """
+    return {
+        name: np.load(os.path.join(directory, filename), mmap_mode='r', allow_pickle=False)
+        for name, filename in manifest['files'].items()
+    }
+
+
+def _build_vectorizer(manifest: dict, arrays: dict):
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    params = dict(manifest['vectorizer']['params'])
+    params['ngram_range'] = tuple(params['ngram_range'])
+    params['dtype'] = np.dtype(params['dtype']).type
+    if isinstance(params.get('tokenizer'), dict):
+        from src.preprocess import HeadlineTokenizer
+        params['tokenizer'] = HeadlineTokenizer(**params['tokenizer']['HeadlineTokenizer'])
+    vectorizer = CountVectorizer(**params)
+    vectorizer.vocabulary_ = dict(zip(arrays['vocabulary'].tolist(), range(len(arrays['vocabulary']))))
+    return vectorizer
+
+
+def _build_encoder(manifest: dict, arrays: dict):
+    from sklearn.preprocessing import LabelEncoder
+
+    encoder = LabelEncoder()
+    encoder.classes_ = np.asarray(arrays['classes'])
+    return encoder
+
+
+def _build_model(manifest: dict, arrays: dict):
+    from sklearn.tree import DecisionTreeClassifier as DT
+    from sklearn.tree._tree import Tree, NODE_DTYPE
+
+    meta = manifest['model']
+    n_classes = np.array(meta['n_classes'], dtype=np.intp)
+
+    nodes = np.zeros(meta['node_count'], dtype=NODE_DTYPE)
+    for field in NODE_DTYPE.names:
+        if field in arrays:
+            nodes[field] = arrays[field]
+
+    tree = Tree(meta['n_features_in'], n_classes, meta['n_outputs'])
+    tree.__setstate__({
+        'max_depth': meta['max_depth'],
+        'node_count': meta['node_count'],
+        'nodes': nodes,
+        'values': np.ascontiguousarray(arrays['value']),
+    })
+
+    model = DT(**meta['params'])
+    model.tree_ = tree
+    model.n_features_in_ = meta['n_features_in']
+    model.n_outputs_ = meta['n_outputs']
+    model.classes_ = np.array(meta['classes'])
+    model.n_classes_ = int(n_classes[0]) if meta['n_outputs'] == 1 else n_classes
+    model.max_features_ = meta['max_features']
+    return model
+
+
+def _build_engine_vectorizer(manifest: dict, arrays: dict):
+    from src.utils.engine import BundleVectorizer
+    return BundleVectorizer(manifest, arrays)
+
+
+def _build_engine_model(manifest: dict, arrays: dict):
+    from src.utils.engine import TreeEngine
+    return TreeEngine(manifest, arrays)
+
+
+class Bundle(dict):
+    """
+    Loaded artifact bundle, objects built from arrays are created on first access so processes
+    using NumPy engine never import sklearn
+    """
+
+    builders = {
+        'vectorizer': _build_vectorizer,
+        'encoder': _build_encoder,
+        'model': _build_model,
+        'engine_vectorizer': _build_engine_vectorizer,
+        'engine_model': _build_engine_model,
+    }
+
+    def __missing__(self, key: str):
+        if key not in self.builders:
+            raise KeyError(key)
+        value = self.builders[key](self['manifest'], self['arrays'])
+        self[key] = value
+        return value
+
+
+def _load(directory: str, content: bytes) -> dict:
+    manifest = json.loads(content)
+    if manifest['version'] != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported artifact bundle version : {manifest['version']}")
+
+    return Bundle(manifest=manifest, arrays=load_arrays(directory, manifest))
+
+
+def load_bundle(directory: str) -> dict:
+    """
+    Returns dict with 'manifest', memory mapped 'arrays' and sklearn 'vectorizer', 'encoder' and
+    'model' (or NumPy 'engine_vectorizer' and 'engine_model') rebuilt from bundle on first access,
+    loaded once per process through artifact registry and reloaded when manifest changes
+
+    Args:
+        directory : bundle directory written by export_bundle
+    """
+    return registry.get(os.path.join(directory, MANIFEST), loader=lambda content: _load(directory, content))
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from src import logger
+from src.utils import read_yaml_config , normalize_headline
+
+
+class PredictionCache:
+    """
+    Two tier cache of predicted labels keyed by normalized headline and artifact version
+
+    In memory tier is LRU bounded by max_size with ttl expiry, optional on disk tier is sqlite
+    file which can be shared by several worker processes
+    """
+
+    def __init__(self, max_size: int = 100000, ttl: float = 86400, path: str = None) -> None:
+        """
+        Args:
+            max_size : maximum number of predictions kept in memory
+            ttl : seconds after which cached prediction expires
+            path : sqlite file of on disk tier, memory only if None
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.path = path
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path is not None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            with self._db:
+                self._db.execute('PRAGMA journal_mode=WAL')
+                self._db.execute('CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, label TEXT, expires_at REAL)')
+                self._db.execute('CREATE INDEX IF NOT EXISTS predictions_expires_at ON predictions (expires_at)')
+
+    @classmethod
+    def from_config(cls, config: dict = None):
+        """
+        Returns cache configured by PredictionCache section of 'config/model_config.yaml', None if disabled
+        """
+        if config is None:
+            config = read_yaml_config('config/model_config.yaml').get('PredictionCache', {})
+        if not config.get('enabled', False):
+            return None
+        return cls(
+            max_size = config['max_size'],
+            ttl = config['ttl'],
+            path = None if config['path'] == 'None' else config['path'],
+        )
+
+    @staticmethod
+    def key(headline: str, version: str) -> str:
+        """
+        Returns cache key of headline predicted with artifacts of given version
+        """
+        return hashlib.sha1(f"{version}\0{normalize_headline(headline)}".encode('utf-8')).hexdigest()
+
+    def get_many(self, keys: list[str]) -> dict:
+        """
+        Returns dict of cached labels for keys present in cache, missing keys are left out
+        """
+        now = time.time()
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    if entry[1] > now:
+                        self._memory.move_to_end(key)
+                        found[key] = entry[0]
+                    else:
+                        del self._memory[key]
+
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if self._db is not None and missing:
+            from_disk = {}
+            with self._lock:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, label, expires_at FROM predictions WHERE expires_at > ? AND key IN ({','.join('?' * len(batch))})",
+                        [now, *batch],
+                    )
+                    for key, label, expires_at in rows:
+                        from_disk[key] = (json.loads(label), expires_at)
+            with self._lock:
+                self.disk_hits += len(from_disk)
+            self._remember({key: entry for key, entry in from_disk.items()})
+            found.update({key: entry[0] for key, entry in from_disk.items()})
+
+        hits = sum(1 for key in keys if key in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def _remember(self, entries: dict) -> None:
+        with self._lock:
+            for key, entry in entries.items():
+                self._memory[key] = entry
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def put_many(self, labels: dict) -> None:
+        """
+        Stores dict of key -> predicted label in every tier
+        """
+        expires_at = time.time() + self.ttl
+        labels = {key: label.item() if hasattr(label, 'item') else label for key, label in labels.items()}
+        self._remember({key: (label, expires_at) for key, label in labels.items()})
+
+        if self._db is not None:
+            try:
+                with self._lock, self._db:
+                    self._db.executemany(
+                        'INSERT OR REPLACE INTO predictions (key, label, expires_at) VALUES (?, ?, ?)',
+                        [(key, json.dumps(label), expires_at) for key, label in labels.items()],
+                    )
+                    self._db.execute('DELETE FROM predictions WHERE expires_at <= ?', (time.time(),))
+            except sqlite3.Error as e:
+                # disk tier is best effort, predictions are still cached in memory
+                logger.error(f"Failed to store predictions in cache file : {self.path} with {e}")
+
+    def stats(self) -> dict:
+        """
+        Returns hit / miss counters and current size of memory tier
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self._memory),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                with self._db:
+                    self._db.execute('DELETE FROM predictions')
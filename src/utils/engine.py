@@ -0,0 +1,391 @@
+import re
+import unicodedata
+import numpy as np
+
+# child index of leaf nodes in sklearn tree arrays
+TREE_LEAF = -1
+
+
+def strip_accents_unicode(text: str) -> str:
+    try:
+        # ascii text has no accents, skips normalization
+        text.encode('ASCII', errors='strict')
+        return text
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize('NFKD', text)
+        return ''.join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def strip_accents_ascii(text: str) -> str:
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+class CSRBatch:
+    """
+    Minimal CSR sparse matrix (data, indices, indptr, shape), same attributes as scipy csr_matrix
+    so engines accept either one
+    """
+
+    def __init__(self, data: np.ndarray, indices: np.ndarray, indptr: np.ndarray, shape: tuple) -> None:
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+
+class BundleVectorizer:
+    """
+    NumPy replica of fitted CountVectorizer.transform built from artifact bundle vocabulary and
+    manifest params (word analyzer only), produces same counts as sklearn without importing it
+    """
+
+    def __init__(self, manifest: dict, arrays: dict) -> None:
+        params = manifest['vectorizer']['params']
+        if params['analyzer'] != 'word' or params['preprocessor'] is not None or params['input'] != 'content':
+            raise ValueError("NumPy engine only supports CountVectorizer with word analyzer, content input and no preprocessor")
+
+        self.vocabulary = {term: i for i, term in enumerate(arrays['vocabulary'].tolist())}
+        self.n_features = len(self.vocabulary)
+        self.lowercase = params['lowercase']
+        self.binary = params['binary']
+        self.encoding = params['encoding']
+        self.decode_error = params['decode_error']
+        self.min_n , self.max_n = params['ngram_range']
+        self.stop_words = frozenset(manifest['vectorizer']['stop_words']) or None
+
+        accents = {None: None, 'unicode': strip_accents_unicode, 'ascii': strip_accents_ascii}
+        if params['strip_accents'] not in accents:
+            raise ValueError(f"Unsupported strip_accents : {params['strip_accents']}")
+        self.strip_accents = accents[params['strip_accents']]
+
+        if isinstance(params.get('tokenizer'), dict):
+            from src.preprocess import HeadlineTokenizer
+            self.tokenize = HeadlineTokenizer(**params['tokenizer']['HeadlineTokenizer'])
+        else:
+            self.tokenize = re.compile(params['token_pattern']).findall
+
+    def analyze(self, doc) -> list[str]:
+        """
+        Returns terms of single document (decode, lowercase, strip accents, tokenize, stop words, n-grams)
+        """
+        if isinstance(doc, bytes):
+            doc = doc.decode(self.encoding, self.decode_error)
+        if self.lowercase:
+            doc = doc.lower()
+        if self.strip_accents is not None:
+            doc = self.strip_accents(doc)
+
+        tokens = self.tokenize(doc)
+        if self.stop_words is not None:
+            tokens = [token for token in tokens if token not in self.stop_words]
+        if self.max_n == 1:
+            return tokens
+
+        original = tokens
+        min_n = self.min_n
+        if min_n == 1:
+            tokens = list(original)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(self.max_n + 1, len(original) + 1)):
+            for i in range(len(original) - n + 1):
+                tokens.append(' '.join(original[i:i + n]))
+        return tokens
+
+    def transform(self, docs: list) -> CSRBatch:
+        """
+        Returns term counts of documents as CSRBatch with sorted column indices
+
+        Args:
+            docs : list of headlines
+
+        output : CSRBatch of shape (len(docs), n_features)
+        """
+        vocabulary = self.vocabulary
+        width = self.n_features
+        keys = []
+        n_docs = 0
+        for row, doc in enumerate(docs):
+            offset = row * width
+            keys.extend(offset + j for j in map(vocabulary.get, self.analyze(doc)) if j is not None)
+            n_docs += 1
+
+        keys , counts = np.unique(np.asarray(keys, dtype=np.int64), return_counts=True)
+        rows = keys // width
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_docs), out=indptr[1:])
+
+        return CSRBatch(
+            data = np.ones_like(counts) if self.binary else counts,
+            indices = (keys - rows * width).astype(np.int32),
+            indptr = indptr,
+            shape = (n_docs, width),
+        )
+
+
+class TreeEngine:
+    """
+    Vectorized batch traversal of decision tree flattened into bundle node arrays
+
+    Only features used by splits are read, so each batch is first scattered into small dense
+    (rows x used features) float32 matrix which is indexed directly while walking the tree.
+    Values are compared as float32 against thresholds like sklearn, so predictions are identical
+    to DecisionTreeClassifier.predict
+
+    Trees are walked in one of two ways, whichever touches fewer elements for given batch :
+        level walk : every row descends one level per numpy pass, cost grows with tree depth
+        jump walk : row follows branch taken by zero valued features until first node testing
+                    feature present in row, so it needs one pass per present feature instead of
+                    one per level. Deep (chain like) trees grown on sparse counts need few passes
+    """
+
+    # dense block of batch is at most this many cells, larger batches are walked in row blocks
+    max_block_cells = 1 << 22
+    # rows which reached leaf are dropped from level walk every this many levels
+    compact_every = 4
+    # batches (or remaining rows of level walk) of at most this many rows are walked one by one,
+    # per level numpy call overhead is higher than plain python lookups for few rows
+    scalar_rows = 16
+
+    def __init__(self, manifest: dict, arrays: dict) -> None:
+        meta = manifest['model']
+        if meta['n_outputs'] != 1:
+            raise ValueError("NumPy engine only supports single output trees")
+
+        self.n_features = meta['n_features_in']
+        self.max_depth = meta['max_depth']
+        # argmax of class values is same for every visit of node, resolve it once per node
+        self.node_class = np.asarray(meta['classes']).take(np.argmax(arrays['value'][:, 0, :], axis=1))
+
+        left_child = np.asarray(arrays['left_child'], dtype=np.intp)
+        right_child = np.asarray(arrays['right_child'], dtype=np.intp)
+        feature = np.asarray(arrays['feature'], dtype=np.intp)
+        split = left_child != TREE_LEAF
+        node = np.arange(left_child.size, dtype=np.intp)
+
+        self.used_features = np.unique(feature[split])
+        # column of every input feature in dense matrix, -1 if no split reads it
+        self.feature_column = np.full(self.n_features, -1, dtype=np.intp)
+        self.feature_column[self.used_features] = np.arange(self.used_features.size)
+        self.width = max(self.used_features.size, 1)
+        # per node : dense column read, threshold and (left, right) child, leaves point to themselves
+        self.node_column = np.where(split, self.feature_column[np.where(split, feature, 0)], 0)
+        threshold = np.where(split, arrays['threshold'], 0.0)
+        # largest float32 not above float64 threshold, x > t and x > t32 agree for every float32 x
+        # so values are compared without upcasting them
+        self.threshold = threshold.astype(np.float32)
+        above = self.threshold.astype(np.float64) > threshold
+        self.threshold[above] = np.nextafter(self.threshold[above], np.float32(-np.inf))
+        self.children = np.stack([np.where(split, left_child, node), np.where(split, right_child, node)], axis=1).ravel()
+        self.is_leaf = ~split
+        self._node_lists = None
+
+        # split nodes grouped by dense column they read
+        split_nodes = np.flatnonzero(split)
+        split_nodes = split_nodes[np.argsort(self.node_column[split_nodes], kind='stable')]
+        self.column_nodes = split_nodes
+        self.column_ptr = np.zeros(self.width + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.node_column[split_nodes], minlength=self.width), out=self.column_ptr[1:])
+        self._zero_paths(split)
+        self._subtrees(left_child, right_child)
+
+    def _zero_paths(self, split: np.ndarray) -> None:
+        """
+        Nodes reached from each other when every tested value is zero form forest whose roots are
+        leaves (parent of node is its zero child). Node u lies on zero path of node n exactly when u
+        is ancestor of n in that forest, tested with euler tour intervals tin[u] <= tin[n] < tout[u]
+        """
+        n_nodes = split.size
+        zero_child = self.children.take(2 * np.arange(n_nodes, dtype=np.intp) + (0.0 > self.threshold))
+
+        kids = [[] for _ in range(n_nodes)]
+        for u, parent in zip(np.flatnonzero(split).tolist(), zero_child[split].tolist()):
+            kids[parent].append(u)
+
+        tin , tout , depth , root = [0] * n_nodes , [0] * n_nodes , [0] * n_nodes , [0] * n_nodes
+        clock = 0
+        for leaf in np.flatnonzero(~split).tolist():
+            root[leaf] = leaf
+            stack = [leaf]
+            while stack:
+                u = stack.pop()
+                if u < 0:
+                    tout[~u] = clock
+                    continue
+                tin[u] = clock
+                clock += 1
+                stack.append(~u)
+                for child in kids[u]:
+                    depth[child] = depth[u] + 1
+                    root[child] = leaf
+                    stack.append(child)
+
+        self.zero_tin = np.asarray(tin, dtype=np.intp)
+        self.zero_tout = np.asarray(tout, dtype=np.intp)
+        # distance from leaf, deeper valid node is closer to current node on zero path
+        self.zero_depth = np.asarray(depth, dtype=np.intp)
+        self.zero_leaf = np.asarray(root, dtype=np.intp)
+
+    def _subtrees(self, left_child: np.ndarray, right_child: np.ndarray) -> None:
+        """
+        Preorder intervals of tree, node u is in subtree of node n exactly when tin[n] <= tin[u] < tout[n]
+        """
+        left , right = left_child.tolist() , right_child.tolist()
+        tin , tout = [0] * len(left) , [0] * len(left)
+        clock = 0
+        stack = [0]
+        while stack:
+            u = stack.pop()
+            if u < 0:
+                tout[~u] = clock
+                continue
+            tin[u] = clock
+            clock += 1
+            stack.append(~u)
+            if left[u] != TREE_LEAF:
+                stack.append(right[u])
+                stack.append(left[u])
+
+        self.tree_tin = np.asarray(tin, dtype=np.intp)
+        self.tree_tout = np.asarray(tout, dtype=np.intp)
+
+    def _entries(self, X, start: int, stop: int) -> tuple:
+        """
+        Returns (rows, dense columns, values) of stored entries of used features in rows start:stop
+        """
+        indptr = np.asarray(X.indptr)
+        begin , end = int(indptr[start]) , int(indptr[stop])
+        columns = self.feature_column.take(np.asarray(X.indices[begin:end]))
+        position = np.flatnonzero(columns >= 0)
+        rows = np.repeat(np.arange(stop - start, dtype=np.intp), np.diff(indptr[start:stop + 1])).take(position)
+        return rows , columns.take(position) , np.asarray(X.data[begin:end]).take(position)
+
+    def _dense(self, n_rows: int, rows: np.ndarray, columns: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """
+        Returns entries as flat (rows x used features) float32 array
+        """
+        dense = np.zeros(n_rows * self.width, dtype=np.float32)
+        dense[rows * self.width + columns] = values
+        return dense
+
+    def _walk_rows(self, dense: np.ndarray, rows: np.ndarray, node: np.ndarray, leaf: np.ndarray) -> None:
+        if self._node_lists is None:
+            self._node_lists = (self.children.tolist(), self.node_column.tolist(), self.threshold.tolist())
+        children , column , threshold = self._node_lists
+
+        for row, current in zip(rows.tolist(), node.tolist()):
+            # float32 values and thresholds as python floats
+            values = dense[row * self.width:(row + 1) * self.width].tolist()
+            while True:
+                child = children[2 * current + (values[column[current]] > threshold[current])]
+                if child == current:
+                    break
+                current = child
+            leaf[row] = current
+
+    def _walk_levels(self, dense: np.ndarray, n_rows: int) -> np.ndarray:
+        leaf = np.empty(n_rows, dtype=np.intp)
+        rows = np.arange(n_rows, dtype=np.intp)
+        node = np.zeros(n_rows, dtype=np.intp)
+        if n_rows <= self.scalar_rows:
+            self._walk_rows(dense, rows, node, leaf)
+            return leaf
+
+        offset = rows * self.width
+        for level in range(1, self.max_depth + 1):
+            x = dense.take(offset + self.node_column.take(node))
+            node = self.children.take(2 * node + (x > self.threshold.take(node)))
+            if level % self.compact_every == 0 and level < self.max_depth:
+                done = self.is_leaf.take(node)
+                if done.any():
+                    leaf[rows[done]] = node[done]
+                    keep = ~done
+                    rows , offset , node = rows[keep] , offset[keep] , node[keep]
+                if rows.size <= self.scalar_rows:
+                    self._walk_rows(dense, rows, node, leaf)
+                    return leaf
+
+        leaf[rows] = node
+        return leaf
+
+    def _pairs(self, rows: np.ndarray, columns: np.ndarray, counts: np.ndarray) -> tuple:
+        """
+        Returns (row, node) of every split node testing feature present in row, ordered by row
+        """
+        first = np.repeat(self.column_ptr.take(columns) - (np.cumsum(counts) - counts), counts)
+        pair_node = self.column_nodes.take(first + np.arange(first.size, dtype=np.intp))
+        return np.repeat(rows, counts) , pair_node
+
+    def _walk_jumps(self, dense: np.ndarray, n_rows: int, pair_row: np.ndarray, pair_node: np.ndarray) -> np.ndarray:
+        leaf = np.empty(n_rows, dtype=np.intp)
+        node = np.zeros(n_rows, dtype=np.intp)
+        live = np.ones(n_rows, dtype=bool)
+
+        while True:
+            # first node on zero path of current node which tests feature present in row, it is
+            # valid pair (ancestor in zero forest) of row with greatest zero depth
+            current_tin = self.zero_tin.take(node.take(pair_row))
+            valid = np.flatnonzero((self.zero_tin.take(pair_node) <= current_tin) & (current_tin < self.zero_tout.take(pair_node)))
+            hit_rows = hit_nodes = valid
+            if valid.size:
+                valid_rows = pair_row.take(valid)
+                starts = np.flatnonzero(np.r_[True, valid_rows[1:] != valid_rows[:-1]])
+                depth = self.zero_depth.take(pair_node.take(valid))
+                deepest = np.flatnonzero(depth == np.repeat(np.maximum.reduceat(depth, starts), np.diff(np.r_[starts, valid.size])))
+                hit_rows , hit_nodes = valid_rows.take(deepest) , pair_node.take(valid.take(deepest))
+
+            # rows without such node follow zero path to its leaf
+            missed = live.copy()
+            missed[hit_rows] = False
+            missed = np.flatnonzero(missed)
+            leaf[missed] = self.zero_leaf.take(node.take(missed))
+            live[missed] = False
+
+            x = dense.take(hit_rows * self.width + self.node_column.take(hit_nodes))
+            child = self.children.take(2 * hit_nodes + (x > self.threshold.take(hit_nodes)))
+            node[hit_rows] = child
+            done = self.is_leaf.take(child)
+            leaf[hit_rows[done]] = child[done]
+            live[hit_rows[done]] = False
+            if not live.any():
+                return leaf
+
+            # path only moves down, pairs outside subtree of current node never become valid
+            current = node.take(pair_row)
+            pair_tin = self.tree_tin.take(pair_node)
+            keep = np.flatnonzero((self.tree_tin.take(current) <= pair_tin) & (pair_tin < self.tree_tout.take(current)))
+            pair_row , pair_node = pair_row.take(keep) , pair_node.take(keep)
+
+    def _walk(self, X, start: int, stop: int) -> np.ndarray:
+        n_rows = stop - start
+        rows , columns , values = self._entries(X, start, stop)
+        dense = self._dense(n_rows, rows, columns, values)
+        if n_rows <= self.scalar_rows:
+            return self._walk_levels(dense, n_rows)
+
+        # jump walk makes one pass over pairs per present feature, level walk one pass over rows per level
+        counts = self.column_ptr.take(columns + 1) - self.column_ptr.take(columns)
+        passes = int(np.bincount(rows, minlength=1).max()) + 1 if rows.size else 1
+        if int(counts.sum()) * passes < n_rows * self.max_depth:
+            return self._walk_jumps(dense, n_rows, *self._pairs(rows, columns, counts))
+        return self._walk_levels(dense, n_rows)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Returns leaf node index of every row of CSR matrix (scipy csr_matrix or CSRBatch)
+        """
+        n_rows = len(X.indptr) - 1
+        block = max(self.max_block_cells // self.width, 1)
+        if n_rows <= block:
+            return self._walk(X, 0, n_rows)
+        return np.concatenate([self._walk(X, start, min(start + block, n_rows)) for start in range(0, n_rows, block)])
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Returns predicted (encoded) class of every row of CSR matrix
+        """
+        return self.node_class.take(self.apply(X))
@@ -0,0 +1,154 @@
+import os
+import json
+import shutil
+import hashlib
+from src import logger
+from src.utils import read_yaml_config
+from src.utils.artifacts import registry
+from src.utils.bundle import MANIFEST
+
+
+def artifact_path(step) -> str:
+    """
+    Returns file holding fitted state of preprocess step or classifier (bundle manifest for steps
+    served from artifact bundle), None if it has no artifact file yet
+    """
+    path = getattr(step, 'load_path', None) or getattr(step, 'filepath', None)
+    if getattr(step, 'bundle_path', None) is not None and os.path.exists(os.path.join(step.bundle_path, MANIFEST)):
+        path = os.path.join(step.bundle_path, MANIFEST)
+    return path if path is not None and os.path.exists(path) else None
+
+
+def artifact_versions(steps: list) -> dict:
+    """
+    Returns {artifact path : content hash} of every step which has artifact file
+    """
+    versions = {}
+    for step in steps:
+        path = artifact_path(step)
+        if path is not None:
+            versions[path] = registry.version(path)
+    return versions
+
+
+class FeatureCache:
+    """
+    Content addressed cache of vectorized feature matrices and encoded labels
+
+    Entry key combines hash of input rows, preprocess steps with preprocess config and (for transform
+    only runs) version of fitted artifacts. Every entry also records versions of artifacts it was
+    produced with and is only used while those artifact files are unchanged, so cached training
+    features are never paired with vectorizer / encoder fitted by some other run.
+    """
+
+    def __init__(self, path: str = 'artifacts/features/', max_entries: int = 20) -> None:
+        """
+        Args:
+            path : directory holding one sub directory per entry
+            max_entries : oldest entries above this count are removed
+        """
+        self.path = path
+        self.max_entries = max_entries
+
+    @classmethod
+    def from_config(cls, config: dict = None):
+        """
+        Returns cache configured by FeatureCache section of 'config/preprocess_config.yaml', None if disabled
+        """
+        if config is None:
+            config = read_yaml_config('config/preprocess_config.yaml').get('FeatureCache', {})
+        if not config.get('enabled', False):
+            return None
+        return cls(path=config['path'], max_entries=config['max_entries'])
+
+    def key(self, data, x_steps: list, y_steps: list, fit: bool) -> str:
+        """
+        Returns cache key of given rows transformed by given steps
+
+        Args:
+            data : DataFrame of input rows
+            x_steps, y_steps : preprocess steps applied on features and labels
+            fit : True if steps are fitted on data (training), False for transform only
+        """
+        import pandas as pd
+
+        digest = hashlib.sha1()
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        digest.update(b'fit' if fit else b'transform')
+        for step in [*x_steps, None, *y_steps]:
+            digest.update(b'|' if step is None else step.__class__.__name__.encode('utf-8'))
+            digest.update(json.dumps(getattr(step, 'config', None), sort_keys=True, default=str).encode('utf-8'))
+        # steps also read other sections (HeadlineTokenizer tokenizer of CountVectTransformer reads
+        # TokenTransformer), so every preprocess setting is part of key
+        config = read_yaml_config('config/preprocess_config.yaml')
+        config.pop('FeatureCache', None)
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode('utf-8'))
+        if not fit:
+            digest.update(json.dumps(artifact_versions([*x_steps, *y_steps]), sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns (X, y) of given key, None if entry is missing or its artifacts were changed since
+        """
+        import numpy as np
+        from scipy.sparse import load_npz
+
+        directory = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(directory, 'meta.json'), 'r') as file:
+                meta = json.load(file)
+            for path, version in meta['artifacts'].items():
+                if not os.path.exists(path) or registry.version(path) != version:
+                    logger.info(f"Feature cache entry {key} is stale, artifact changed : {path}")
+                    return None
+            X = load_npz(os.path.join(directory, 'X.npz'))
+            y = np.load(os.path.join(directory, 'y.npy'), allow_pickle=meta['y_object'])
+        except FileNotFoundError:
+            return None
+
+        logger.info(f"Loaded features from cache : {directory}")
+        os.utime(directory)
+        return X , y
+
+    def put(self, key: str, X, y, steps: list) -> None:
+        """
+        Stores transformed features and labels with versions of artifacts of given steps, only
+        sparse feature matrices are cached
+        """
+        import numpy as np
+        from scipy.sparse import issparse , save_npz
+
+        if not issparse(X):
+            return
+
+        y = np.asarray(y)
+        directory = os.path.join(self.path, key)
+        tmp_directory = f"{directory}.tmp{os.getpid()}"
+        os.makedirs(tmp_directory, exist_ok=True)
+        try:
+            save_npz(os.path.join(tmp_directory, 'X.npz'), X, compressed=False)
+            np.save(os.path.join(tmp_directory, 'y.npy'), y, allow_pickle=y.dtype == object)
+            # meta is written last, entry without meta is never read
+            with open(os.path.join(tmp_directory, 'meta.json'), 'w') as file:
+                json.dump({'artifacts': artifact_versions(steps), 'y_object': bool(y.dtype == object)}, file)
+
+            shutil.rmtree(directory, ignore_errors=True)
+            os.replace(tmp_directory, directory)
+        finally:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+        logger.info(f"Saved features to cache : {directory}")
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = [
+            os.path.join(self.path, name) for name in os.listdir(self.path)
+            if os.path.exists(os.path.join(self.path, name, 'meta.json'))
+        ]
+        entries.sort(key=os.path.getmtime, reverse=True)
+        for directory in entries[self.max_entries:]:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -0,0 +1,231 @@
+import os
+import time
+import logging
+import bisect
+import datetime
+import threading
+import resource
+from contextlib import contextmanager
+from src import logger
+from src.utils import read_yaml_config
+
+# upper bounds (seconds) of prometheus histogram buckets of stage durations
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def current_rss_bytes() -> int:
+    """
+    Returns resident set size of current process, peak RSS where /proc is not available
+    """
+    try:
+        with open('/proc/self/statm', 'rb') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageRegistry:
+    """
+    Process wide aggregate of stage timings of every pipeline run, rendered in prometheus text format
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, pipeline: str, stage: str, wall: float, cpu: float, rows: int) -> None:
+        with self._lock:
+            entry = self._stages.setdefault((pipeline, stage), {
+                'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0, 'buckets': [0] * len(BUCKETS),
+            })
+            entry['calls'] += 1
+            entry['wall'] += wall
+            entry['cpu'] += cpu
+            entry['rows'] += rows or 0
+            index = bisect.bisect_left(BUCKETS, wall)
+            if index < len(BUCKETS):
+                entry['buckets'][index] += 1
+
+    def render(self) -> str:
+        """
+        Returns every observed stage in prometheus text exposition format
+        """
+        lines = [
+            '# HELP sentistock_stage_duration_seconds Wall time of pipeline stages',
+            '# TYPE sentistock_stage_duration_seconds histogram',
+        ]
+        with self._lock:
+            stages = {key: {**entry, 'buckets': list(entry['buckets'])} for key, entry in self._stages.items()}
+
+        for (pipeline, stage), entry in sorted(stages.items()):
+            labels = f'pipeline="{pipeline}",stage="{stage}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, entry['buckets']):
+                cumulative += count
+                lines.append(f'sentistock_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'sentistock_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["calls"]}')
+            lines.append(f'sentistock_stage_duration_seconds_sum{{{labels}}} {entry["wall"]}')
+            lines.append(f'sentistock_stage_duration_seconds_count{{{labels}}} {entry["calls"]}')
+
+        for name, field, help_text in [
+            ('sentistock_stage_cpu_seconds_total', 'cpu', 'CPU time of pipeline stages'),
+            ('sentistock_stage_rows_total', 'rows', 'Rows processed by pipeline stages'),
+        ]:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (pipeline, stage), entry in sorted(stages.items()):
+                lines.append(f'{name}{{pipeline="{pipeline}",stage="{stage}"}} {entry[field]}')
+
+        return '\n'.join(lines) + '\n'
+
+
+stage_registry = StageRegistry()
+
+
+class StageMetrics:
+    """
+    Collects wall time, CPU time, rows (and memory delta if enabled) of every stage of single pipeline run,
+    per stage records are logged at DEBUG level and summary of whole run at INFO level when run finishes
+
+    Usage:
+        metrics = StageMetrics('TrainingPipeline')
+        with metrics.profile():
+            with metrics.stage('load') as stage:
+                data = load()
+                stage['rows'] = len(data)
+    """
+
+    def __init__(self, pipeline: str, config: dict = None) -> None:
+        """
+        Args:
+            pipeline : name of pipeline, used in log records and metric labels
+            config : Instrumentation section of 'config/model_config.yaml' if None
+        """
+        if config is None:
+            config = read_yaml_config('config/model_config.yaml').get('Instrumentation', {})
+
+        self.pipeline = pipeline
+        self.profile_enabled = config.get('profile', False) or os.environ.get('SENTISTOCK_PROFILE') == '1'
+        self.profile_dir = config.get('profile_dir', 'logs/profiles')
+        self.mlflow_enabled = config.get('mlflow_metrics', True)
+        # reading /proc twice per stage costs more than timing it, sampled only on request
+        self.memory_enabled = config.get('stage_memory', False)
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, rows: int = None):
+        """
+        Measures block as stage with given name, yields dict in which 'rows' can be set inside block,
+        repeated stages with same name (e.g. chunks) are summed
+        """
+        record = {'rows': rows}
+        rss = current_rss_bytes() if self.memory_enabled else 0
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0}
+                if self.memory_enabled:
+                    entry['memory_delta_mb'] = 0.0
+            entry['calls'] += 1
+            entry['wall_s'] += wall
+            entry['cpu_s'] += cpu
+            entry['rows'] += record['rows'] or 0
+            memory = None
+            if self.memory_enabled:
+                memory = (current_rss_bytes() - rss) / (1024 * 1024)
+                entry['memory_delta_mb'] += memory
+
+            stage_registry.observe(self.pipeline, name, wall, cpu, record['rows'])
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"Stage {name} of {self.pipeline} took {wall:.4f}s wall, {cpu:.4f}s cpu, rows : {record['rows']}"
+                    + ('' if memory is None else f", memory delta : {memory:+.1f} MB")
+                )
+
+    def as_metrics(self) -> dict:
+        """
+        Returns flat dict of stage metrics e.g. {'stage.load.wall_s': 0.12}
+        """
+        return {
+            f"stage.{name}.{field}": value
+            for name, entry in self.stages.items()
+            for field, value in entry.items()
+        }
+
+    def log_summary(self) -> None:
+        """
+        Logs single INFO record with wall time, CPU time and rows of every stage of run
+        """
+        if not self.stages or not logger.isEnabledFor(logging.INFO):
+            return
+        stages = ', '.join(
+            f"{name} {entry['wall_s']:.4f}s wall / {entry['cpu_s']:.4f}s cpu / {entry['rows']} rows"
+            + (f" / {entry['calls']} calls" if entry['calls'] > 1 else '')
+            for name, entry in self.stages.items()
+        )
+        logger.info(f"Stages of {self.pipeline} : {stages}")
+
+    def log_to_mlflow(self, run_name: str = None) -> None:
+        """
+        Logs stage metrics to active MLflow run, or to new run with given name if none is active
+        """
+        if not self.mlflow_enabled:
+            return
+        import mlflow
+        if mlflow.active_run() is not None:
+            mlflow.log_metrics(self.as_metrics())
+            return
+        with mlflow.start_run(run_name=run_name):
+            mlflow.log_metrics(self.as_metrics())
+
+    @contextmanager
+    def profile(self):
+        """
+        Wraps whole run, logs stage summary when block exits and captures cProfile stats and
+        tracemalloc top allocations of block into profile_dir when profiling is enabled by config
+        or SENTISTOCK_PROFILE=1
+        """
+        try:
+            with self._profile():
+                yield
+        finally:
+            self.log_summary()
+
+    @contextmanager
+    def _profile(self):
+        if not self.profile_enabled:
+            yield
+            return
+
+        import cProfile
+        import tracemalloc
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        prefix = os.path.join(self.profile_dir, f"{self.pipeline}_{datetime.datetime.now():%Y%m%d_%H%M%S_%f}")
+
+        profiler = cProfile.Profile()
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{prefix}.prof")
+
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            with open(f"{prefix}_memory.txt", 'w') as file:
+                for stat in snapshot.statistics('lineno')[:50]:
+                    file.write(f"{stat}\n")
+
+            logger.info(f"Saved profile of {self.pipeline} run to : {prefix}.prof")